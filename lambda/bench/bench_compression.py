@@ -0,0 +1,77 @@
+"""Size / CPU trade-off of compressing GET /tasks bodies.
+
+Builds task-list bodies shaped like the real ones (TEXT descriptions
+included) and, for gzip and deflate at several levels, reports the
+compressed size, the size after base64 (what the Lambda actually returns)
+and the time to compress.
+
+    python bench/bench_compression.py --rows 50 200 1000 --desc-words 40
+"""
+import argparse
+import base64
+import gzip
+import json
+import random
+import time
+import zlib
+
+WORDS = (
+    "laporan tugas belajar golang data penjualan revisi struct interface "
+    "deploy lambda aurora query index review meeting client invoice bug fix"
+).split()
+
+
+def make_body(rows, desc_words, seed=1):
+    rnd = random.Random(seed)
+    tasks = [
+        {
+            "id": i,
+            "title": " ".join(rnd.choices(WORDS, k=4)).title(),
+            "description": " ".join(rnd.choices(WORDS, k=desc_words)),
+            "due_date": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "priority": rnd.choice(["Low", "Medium", "High"]),
+            "completed": rnd.random() < 0.3,
+        }
+        for i in range(rows, 0, -1)
+    ]
+    return json.dumps(tasks, separators=(",", ":")).encode("utf-8")
+
+
+def timed(fn, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--desc-words", type=int, default=40)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 6, 9])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'codec':>8} {'level':>5} {'raw':>9} {'compressed':>10} "
+          f"{'base64':>9} {'ratio':>6} {'ms':>8} {'MB/s':>7}")
+    for rows in args.rows:
+        body = make_body(rows, args.desc_words)
+        print(f"{rows:>6} {'none':>8} {'-':>5} {len(body):>9} {len(body):>10} {len(body):>9} {1.0:>6.2f} {0:>8.3f} {'-':>7}")
+        for codec in ("gzip", "deflate"):
+            for level in args.levels:
+                if codec == "gzip":
+                    fn = lambda data: gzip.compress(data, level, mtime=0)
+                else:
+                    fn = lambda data: zlib.compress(data, level)
+                out, secs = timed(fn, body, args.repeat)
+                print(
+                    f"{rows:>6} {codec:>8} {level:>5} {len(body):>9} {len(out):>10} "
+                    f"{len(base64.b64encode(out)):>9} {len(body) / len(out):>6.2f} "
+                    f"{secs * 1000:>8.3f} {len(body) / secs / 1e6:>7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Import-time check for the bundled pymysql.
+
+Runs ``python -X importtime -c "import pymysql"`` in fresh interpreters
+against the vendored copy under python/python, reports the best and median
+cumulative time and the heaviest modules, and exits 1 when
+
+* a module that pymysql is supposed to load lazily (ssl, cryptography,
+  the ER table, ...) is imported by ``import pymysql``, or
+* the best cumulative time exceeds --budget-ms.
+
+The first check is deterministic and catches most regressions. The budget
+is a coarse backstop, because absolute numbers depend on the machine.
+
+    python bench/bench_import.py --repeat 20 --budget-ms 30
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+VENDORED = pathlib.Path(__file__).resolve().parent.parent / "python" / "python"
+
+# Only needed for TLS, RSA/ed25519 auth, option files, error paths or a
+# missing user name; none of them may be imported by "import pymysql".
+LAZY_MODULES = (
+    "ssl",
+    "_ssl",
+    "cryptography",
+    "nacl",
+    "pymysql.constants.ER",
+    "pymysql.optionfile",
+    "configparser",
+    "getpass",
+    "traceback",
+)
+
+
+def measure(target):
+    """{module: (self_us, cumulative_us)} for one fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=str(VENDORED))
+    # measure imports from bytecode, not compilation of stale sources
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        modules[name.strip()] = (int(self_us), int(cumulative))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="pymysql")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=30.0,
+                        help="fail when the best cumulative time is above this")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    measure(args.target)  # writes __pycache__ if needed
+    runs = [measure(args.target) for _ in range(args.repeat)]
+    totals = sorted(run[args.target][1] / 1000 for run in runs)
+    best, median = totals[0], statistics.median(totals)
+    print(f"import {args.target}: best {best:.2f} ms, median {median:.2f} ms "
+          f"over {args.repeat} runs")
+
+    fastest = min(runs, key=lambda run: run[args.target][1])
+    print(f"\n{'self ms':>8} {'cumul ms':>9}  module")
+    heaviest = sorted(fastest.items(), key=lambda item: -item[1][0])[:args.top]
+    for name, (self_us, cumulative) in heaviest:
+        print(f"{self_us / 1000:>8.2f} {cumulative / 1000:>9.2f}  {name}")
+
+    failed = False
+    eager = [m for m in LAZY_MODULES if any(m in run for run in runs)]
+    if eager:
+        print(f"\nFAIL: imported eagerly: {', '.join(eager)}", file=sys.stderr)
+        failed = True
+    if best > args.budget_ms:
+        print(f"\nFAIL: {best:.2f} ms > budget {args.budget_ms} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Row decoding cost of text vs binary (prepared statement) result sets.
+
+Encodes the same synthetic rows in the text protocol (COM_QUERY) and in the
+binary protocol (COM_STMT_EXECUTE) and times how long the vendored pymysql
+takes to turn each result set into Python rows: MySQLResult for text,
+BinaryResult for binary. No server is involved; the packets are replayed
+from memory, so only the decoding is measured. Both decoders must return
+the same rows, otherwise the run fails.
+
+    python bench/bench_rows.py --rows 1000 --repeat 20
+"""
+import argparse
+import datetime
+import pathlib
+import random
+import struct
+import sys
+import time
+
+VENDORED = pathlib.Path(__file__).resolve().parent.parent / "python" / "python"
+# Benchmark the vendored driver, not whatever happens to be installed.
+sys.path.insert(0, str(VENDORED))
+
+from pymysql import converters  # noqa: E402
+from pymysql.connections import BinaryResult, MySQLResult  # noqa: E402
+from pymysql.constants import CLIENT, FIELD_TYPE, FLAG  # noqa: E402
+from pymysql.protocol import MysqlPacket  # noqa: E402
+
+UTF8MB4 = 255
+BINARY = 63
+
+
+def _lenenc_str(b):
+    if len(b) < 0xFB:
+        return bytes((len(b),)) + b
+    return b"\xfc" + struct.pack("<H", len(b)) + b
+
+
+# name -> columns as (name, type, flags) and a row generator
+def _numeric(rnd, i):
+    return (
+        i,
+        rnd.randint(-(2**31), 2**31 - 1),
+        rnd.randint(0, 2**32 - 1),
+        rnd.randint(-(2**15), 2**15 - 1),
+        rnd.randint(0, 1),
+        rnd.randint(0, 2**63),
+        round(rnd.uniform(-1e6, 1e6), 6),
+        rnd.uniform(0, 1),
+    )
+
+
+def _temporal(rnd, i):
+    base = datetime.datetime(2020, 1, 1) + datetime.timedelta(seconds=rnd.randint(0, 10**8))
+    return (
+        i,
+        base.date(),
+        base,
+        base.replace(microsecond=rnd.randint(0, 999999)),
+        base + datetime.timedelta(days=1),
+        datetime.timedelta(seconds=rnd.randint(-(10**6), 10**6)),
+    )
+
+
+def _tasks(rnd, i):
+    words = "laporan tugas belajar golang data revisi deploy lambda query bug".split()
+    return (
+        i,
+        " ".join(rnd.choices(words, k=4)).title(),
+        " ".join(rnd.choices(words, k=12)),
+        datetime.date(2025, rnd.randint(1, 12), rnd.randint(1, 28)) if i % 7 else None,
+        rnd.choice(["Low", "Medium", "High", None]),
+        rnd.randint(0, 1),
+    )
+
+
+SHAPES = {
+    "numeric": (
+        [
+            ("id", FIELD_TYPE.LONGLONG, FLAG.UNSIGNED),
+            ("a", FIELD_TYPE.LONG, 0),
+            ("b", FIELD_TYPE.LONG, FLAG.UNSIGNED),
+            ("c", FIELD_TYPE.SHORT, 0),
+            ("d", FIELD_TYPE.TINY, 0),
+            ("e", FIELD_TYPE.LONGLONG, FLAG.UNSIGNED),
+            ("f", FIELD_TYPE.DOUBLE, 0),
+            ("g", FIELD_TYPE.DOUBLE, 0),
+        ],
+        _numeric,
+    ),
+    "temporal": (
+        [
+            ("id", FIELD_TYPE.LONG, 0),
+            ("day", FIELD_TYPE.DATE, 0),
+            ("created", FIELD_TYPE.DATETIME, 0),
+            ("updated", FIELD_TYPE.DATETIME, 0),
+            ("expires", FIELD_TYPE.TIMESTAMP, 0),
+            ("duration", FIELD_TYPE.TIME, 0),
+        ],
+        _temporal,
+    ),
+    "tasks": (
+        [
+            ("id", FIELD_TYPE.LONG, 0),
+            ("title", FIELD_TYPE.VAR_STRING, 0),
+            ("description", FIELD_TYPE.BLOB, 0),
+            ("due_date", FIELD_TYPE.DATE, 0),
+            ("priority", FIELD_TYPE.VAR_STRING, 0),
+            ("completed", FIELD_TYPE.TINY, 0),
+        ],
+        _tasks,
+    ),
+}
+
+
+def column_packet(name, type_code, flags):
+    text = type_code in (FIELD_TYPE.VAR_STRING, FIELD_TYPE.BLOB)
+    name = name.encode()
+    return (
+        _lenenc_str(b"def") + _lenenc_str(b"") + _lenenc_str(b"t") + _lenenc_str(b"t")
+        + _lenenc_str(name) + _lenenc_str(name) + b"\x0c"
+        + struct.pack("<HIBHBxx", UTF8MB4 if text else BINARY, 255, type_code, flags, 0)
+    )
+
+
+def text_value(value):
+    if value is None:
+        return b"\xfb"
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat(" ", "microseconds" if value.microsecond else "seconds")
+    elif isinstance(value, datetime.timedelta):
+        sign = "-" if value < datetime.timedelta(0) else ""
+        seconds = abs(int(value.total_seconds()))
+        value = "%s%02d:%02d:%02d" % (sign, seconds // 3600, seconds // 60 % 60, seconds % 60)
+    elif isinstance(value, float):
+        value = repr(value)
+    return _lenenc_str(str(value).encode())
+
+
+def binary_value(type_code, flags, value):
+    if type_code in (FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        if type_code == FIELD_TYPE.DATE:
+            return struct.pack("<BHBB", 4, value.year, value.month, value.day)
+        fields = (value.year, value.month, value.day, value.hour, value.minute, value.second)
+        if value.microsecond:
+            return struct.pack("<BHBBBBBI", 11, *fields, value.microsecond)
+        return struct.pack("<BHBBBBB", 7, *fields)
+    if type_code == FIELD_TYPE.TIME:
+        negative = value < datetime.timedelta(0)
+        value = abs(value)
+        return struct.pack("<BBIBBB", 8, negative, value.days, value.seconds // 3600,
+                           value.seconds // 60 % 60, value.seconds % 60)
+    fmt = {
+        FIELD_TYPE.TINY: "<b",
+        FIELD_TYPE.SHORT: "<h",
+        FIELD_TYPE.LONG: "<i",
+        FIELD_TYPE.LONGLONG: "<q",
+        FIELD_TYPE.DOUBLE: "<d",
+    }.get(type_code)
+    if fmt is None:
+        return _lenenc_str(str(value).encode())
+    if flags & FLAG.UNSIGNED:
+        fmt = fmt.upper()
+    return struct.pack(fmt, value)
+
+
+def binary_row(columns, row):
+    null_bitmap = bytearray((len(columns) + 9) // 8)
+    values = []
+    for i, ((_, type_code, flags), value) in enumerate(zip(columns, row)):
+        if value is None:
+            null_bitmap[(i + 2) >> 3] |= 1 << ((i + 2) & 7)
+        else:
+            values.append(binary_value(type_code, flags, value))
+    return b"\x00" + bytes(null_bitmap) + b"".join(values)
+
+
+def result_packets(columns, rows, binary):
+    # as sent to a client with CLIENT_DEPRECATE_EOF: no EOF after the
+    # columns, and an OK packet with the EOF header after the rows
+    packets = [bytes((len(columns),))]
+    packets += [column_packet(*c) for c in columns]
+    for row in rows:
+        if binary:
+            packets.append(binary_row(columns, row))
+        else:
+            packets.append(b"".join(text_value(v) for v in row))
+    packets.append(b"\xfe\x00\x00\x02\x00\x00\x00")
+    return packets
+
+
+class ReplayConnection:
+    """Just enough of Connection for MySQLResult.read()."""
+
+    use_unicode = True
+    encoding = "utf8"
+    client_flag = CLIENT.DEPRECATE_EOF
+    decoders = {k: v for k, v in converters.conversions.items() if type(k) is int}
+    _result = None
+
+    def __init__(self, packets):
+        self._packets = iter(packets)
+
+    def _read_packet(self, packet_type=MysqlPacket):
+        return packet_type(next(self._packets), self.encoding)
+
+
+def decode(result_class, packets):
+    result = result_class(ReplayConnection(packets))
+    result.read()
+    return result.rows
+
+
+def timed(result_class, packets, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(result_class, packets)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'shape':>9} {'rows':>6} {'text ms':>8} {'binary ms':>9} {'speedup':>7} "
+          f"{'text B':>8} {'binary B':>8}")
+    for shape in args.shapes:
+        columns, make_row = SHAPES[shape]
+        for rows in args.rows:
+            rnd = random.Random(rows)
+            data = [make_row(rnd, i) for i in range(1, rows + 1)]
+            text = result_packets(columns, data, binary=False)
+            binary = result_packets(columns, data, binary=True)
+            if decode(MySQLResult, text) != decode(BinaryResult, binary):
+                sys.exit(f"{shape}: text and binary rows differ")
+            text_s = timed(MySQLResult, text, args.repeat)
+            binary_s = timed(BinaryResult, binary, args.repeat)
+            print(
+                f"{shape:>9} {rows:>6} {text_s * 1000:>8.3f} {binary_s * 1000:>9.3f} "
+                f"{text_s / binary_s:>6.2f}x {sum(map(len, text)):>8} "
+                f"{sum(map(len, binary)):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""Local load test for lambda_handler.
+
+Generates API Gateway proxy events for the routes the handler serves,
+replays them over HTTP through a thread-pooled adapter that turns each
+request back into an event, and reports throughput, p50/p95/p99 latency
+and SQL round trips per request for every route.
+
+Each adapter worker owns its own copy of lambda_function (loaded under a
+separate module name), so module-level state such as the connection and
+the caches behaves like one warm Lambda container per worker. Round trips
+are counted by wrapping the driver's command writer; connects are counted
+separately, so a handler that reconnects or re-runs its bootstrap on
+every request shows up immediately.
+
+Against the in-process protocol stand-in (no database needed):
+
+    python bench/loadtest.py --standin --requests 5000 --concurrency 8
+
+With a second stand-in as the read replica (DB_READER_HOST), to check how
+reads and writes are split between the two:
+
+    python bench/loadtest.py --standin --reader-standin
+
+With the MySQL compressed protocol (DB_COMPRESS), reporting the bytes the
+stand-in sent and received:
+
+    python bench/loadtest.py --standin --db-compress zlib
+
+Against a local MySQL, with DB_* taken from the environment as in Lambda:
+
+    DB_HOST=127.0.0.1 DB_USER=root DB_PASSWORD=... DB_NAME=tasks \\
+        python bench/loadtest.py --duration 30 --mix list=60,get=30,create=10
+
+Print the generated events instead of running them:
+
+    python bench/loadtest.py --dump-events 20
+"""
+import argparse
+import base64
+import gzip
+import http.client
+import importlib.util
+import json
+import os
+import pathlib
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = pathlib.Path(__file__).resolve().parent
+LAMBDA_DIR = HERE.parent
+# Benchmark the vendored driver, not whatever happens to be installed.
+sys.path.insert(0, str(LAMBDA_DIR / "python" / "python"))
+
+import pymysql.connections  # noqa: E402
+
+from mysql_standin import StandIn  # noqa: E402
+
+DEFAULT_MIX = "list=40,list_filtered=10,list_page=8,search=2,get=22,stats=3,create=6,update=5,delete=3,bulk_create=1"
+
+WORDS = (
+    "laporan tugas belajar golang data penjualan revisi struct interface "
+    "deploy lambda aurora query index review meeting client invoice bug fix"
+).split()
+
+
+# -- events -----------------------------------------------------------------
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise SystemExit(f"unknown route {name!r}; choose from {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _event(method, path, params=None, body=None, headers=None):
+    return {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": params or None,
+        "headers": dict(headers or {}),
+        "body": None if body is None else json.dumps(body),
+        "isBase64Encoded": False,
+    }
+
+
+def _task(rnd):
+    return {
+        "title": " ".join(rnd.choices(WORDS, k=4)).title(),
+        "description": " ".join(rnd.choices(WORDS, k=20)),
+        "due_date": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        "priority": rnd.choice(["Low", "Medium", "High"]),
+        "completed": False,
+    }
+
+
+ROUTES = {
+    "list": lambda rnd, ids: _event("GET", "/tasks"),
+    "list_filtered": lambda rnd, ids: _event("GET", "/tasks", {
+        "completed": "false",
+        "priority": rnd.choice(["High", "Medium,High"]),
+        "sort": "due_date",
+    }),
+    "list_page": lambda rnd, ids: _event("GET", "/tasks", {
+        "after_id": str(rnd.randint(1, ids)), "limit": "20",
+    }),
+    "search": lambda rnd, ids: _event("GET", "/tasks", {"q": rnd.choice(WORDS), "limit": "20"}),
+    "get": lambda rnd, ids: _event("GET", f"/tasks/{rnd.randint(1, ids)}"),
+    "stats": lambda rnd, ids: _event("GET", "/tasks/stats"),
+    "create": lambda rnd, ids: _event("POST", "/tasks", body=_task(rnd)),
+    "update": lambda rnd, ids: _event(
+        "PATCH", f"/tasks/{rnd.randint(1, ids)}", body={"completed": rnd.random() < 0.5}),
+    "delete": lambda rnd, ids: _event("DELETE", f"/tasks/{rnd.randint(1, ids)}"),
+    "bulk_create": lambda rnd, ids: _event(
+        "POST", "/tasks", body=[_task(rnd) for _ in range(25)]),
+}
+
+
+def generate_events(mix, ids, seed=1, accept_encoding=None):
+    """Endless stream of (route name, proxy event) drawn from ``mix``."""
+    rnd = random.Random(seed)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    while True:
+        name = rnd.choices(names, weights)[0]
+        event = ROUTES[name](rnd, ids)
+        if accept_encoding:
+            event["headers"]["Accept-Encoding"] = accept_encoding
+        yield name, event
+
+
+# -- handler side -----------------------------------------------------------
+
+_counters = threading.local()
+
+
+def _count(key):
+    setattr(_counters, key, getattr(_counters, key, 0) + 1)
+
+
+def install_counters():
+    """Count commands and connects per thread by wrapping the driver."""
+    conn_cls = pymysql.connections.Connection
+    execute_command = conn_cls._execute_command
+    send_commands = conn_cls._send_commands
+    connect = conn_cls.connect
+
+    def counting_execute_command(self, command, sql):
+        _count("commands")
+        return execute_command(self, command, sql)
+
+    # a pipeline is one round trip
+    def counting_send_commands(self, commands):
+        _count("commands")
+        return send_commands(self, commands)
+
+    def counting_connect(self, *args, **kwargs):
+        _count("connects")
+        return connect(self, *args, **kwargs)
+
+    conn_cls._execute_command = counting_execute_command
+    conn_cls._send_commands = counting_send_commands
+    conn_cls.connect = counting_connect
+
+
+def load_container(index):
+    """Fresh copy of lambda_function with its own module state."""
+    spec = importlib.util.spec_from_file_location(
+        f"lambda_function_{index}", LAMBDA_DIR / "lambda_function.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def decode_body(response):
+    body = response.get("body") or ""
+    if not response.get("isBase64Encoded"):
+        return body.encode("utf-8")
+    body = base64.b64decode(body)
+    encoding = response.get("headers", {}).get("Content-Encoding")
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+class Adapter(ThreadingHTTPServer):
+    """HTTP front end that invokes one container per request."""
+
+    daemon_threads = True
+
+    def __init__(self, address, containers):
+        super().__init__(address, AdapterHandler)
+        self.containers = queue.Queue()
+        for c in containers:
+            self.containers.put(c)
+
+
+class AdapterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _invoke(self):
+        url = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else None
+        params = dict(urllib.parse.parse_qsl(url.query)) or None
+        event = {
+            "httpMethod": self.command,
+            "path": url.path,
+            "queryStringParameters": params,
+            "headers": dict(self.headers.items()),
+            "body": body,
+            "isBase64Encoded": False,
+        }
+
+        container = self.server.containers.get()
+        _counters.commands = _counters.connects = 0
+        try:
+            response = container.lambda_handler(event, None)
+        except Exception as e:
+            response = {"statusCode": 599, "headers": {}, "body": repr(e)}
+        finally:
+            self.server.containers.put(container)
+
+        payload = decode_body(response)
+        self.send_response(response["statusCode"])
+        for key, value in (response.get("headers") or {}).items():
+            if key.lower() != "content-encoding":
+                self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-Loadtest-Commands", str(_counters.commands))
+        self.send_header("X-Loadtest-Connects", str(_counters.connects))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _invoke
+
+    def log_message(self, *args):
+        pass
+
+
+# -- client side ------------------------------------------------------------
+
+class Driver:
+    """Replays events against the adapter from a pool of client threads."""
+
+    def __init__(self, port, events, requests, duration, concurrency):
+        self.port = port
+        self.events = events
+        self.remaining = requests
+        self.deadline = time.perf_counter() + duration if duration else None
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.samples = []
+
+    def _next(self):
+        with self.lock:
+            if self.deadline is not None:
+                if time.perf_counter() >= self.deadline:
+                    return None
+            elif self.remaining <= 0:
+                return None
+            self.remaining -= 1
+            return next(self.events)
+
+    def _worker(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        samples = []
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            name, event = item
+            path = event["path"]
+            if event["queryStringParameters"]:
+                path += "?" + urllib.parse.urlencode(event["queryStringParameters"])
+            body = event["body"].encode("utf-8") if event["body"] else None
+            start = time.perf_counter()
+            conn.request(event["httpMethod"], path, body=body, headers=event["headers"])
+            resp = conn.getresponse()
+            resp.read()
+            elapsed = time.perf_counter() - start
+            samples.append((
+                name, resp.status, elapsed,
+                int(resp.getheader("X-Loadtest-Commands", 0)),
+                int(resp.getheader("X-Loadtest-Connects", 0)),
+            ))
+        conn.close()
+        with self.lock:
+            self.samples.extend(samples)
+
+    def run(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            for f in [pool.submit(self._worker) for _ in range(self.concurrency)]:
+                f.result()
+        return time.perf_counter() - start
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def report(samples, elapsed):
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+    print(f"\n{len(samples)} requests in {elapsed:.2f}s = {len(samples) / elapsed:.1f} req/s\n")
+    print(f"{'route':<14} {'n':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'sql/req':>8} {'conn/req':>8}")
+    rows = sorted(groups.items()) + [("all", samples)]
+    for name, group in rows:
+        latencies = sorted(s[2] for s in group)
+        errors = sum(1 for s in group if s[1] >= 500)
+        commands = sum(s[3] for s in group) / len(group)
+        connects = sum(s[4] for s in group) / len(group)
+        print(f"{name:<14} {len(group):>7} {errors:>5} "
+              f"{percentile(latencies, 50) * 1000:>8.2f} "
+              f"{percentile(latencies, 95) * 1000:>8.2f} "
+              f"{percentile(latencies, 99) * 1000:>8.2f} "
+              f"{commands:>8.2f} {connects:>8.3f}")
+    return sum(s[3] for s in samples) / max(len(samples), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[2:]))
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"route=weight,... from: {', '.join(ROUTES)}")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, help="run for N seconds instead of --requests")
+    parser.add_argument("--concurrency", type=int, default=4, help="client threads")
+    parser.add_argument("--containers", type=int,
+                        help="warm handler copies (default: --concurrency)")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests first")
+    parser.add_argument("--ids", type=int, default=1000, help="ids drawn for /tasks/{id}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--accept-encoding", help="e.g. gzip, to include compression")
+    parser.add_argument("--standin", action="store_true",
+                        help="use the in-process MySQL protocol stand-in")
+    parser.add_argument("--standin-rows", type=int, default=10000)
+    parser.add_argument("--reader-standin", action="store_true",
+                        help="with --standin, start a second stand-in as DB_READER_HOST")
+    parser.add_argument("--db-compress", choices=["zlib", "zstd"],
+                        help="set DB_COMPRESS; the stand-in then offers compression")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="stand-in delay per command, to model network round trips")
+    parser.add_argument("--max-sql-per-request", type=float,
+                        help="exit 1 when the mean round trips per request exceed this")
+    parser.add_argument("--dump-events", type=int, metavar="N",
+                        help="print N generated events as JSON lines and exit")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    events = generate_events(mix, args.ids, args.seed, args.accept_encoding)
+    if args.dump_events:
+        for _, (name, event) in zip(range(args.dump_events), events):
+            print(json.dumps({"route": name, "event": event}))
+        return 0
+
+    if args.db_compress:
+        os.environ["DB_COMPRESS"] = args.db_compress
+    standin_kwargs = dict(rows=args.standin_rows, latency=args.latency_ms / 1000,
+                          compress=bool(args.db_compress))
+    standins = {}
+    if args.standin:
+        standins["writer"] = StandIn(**standin_kwargs).start()
+        os.environ.update(DB_HOST="127.0.0.1", DB_PORT=str(standins["writer"].port),
+                          DB_USER="loadtest", DB_PASSWORD="loadtest", DB_NAME="tasks")
+        if args.reader_standin:
+            standins["reader"] = StandIn(**standin_kwargs).start()
+            os.environ.update(DB_READER_HOST="127.0.0.1", DB_READER_PORT=str(standins["reader"].port))
+    elif "DB_HOST" not in os.environ:
+        raise SystemExit("set DB_HOST/DB_USER/DB_PASSWORD/DB_NAME or pass --standin")
+
+    # keep the handler's per-invocation metric lines out of the report
+    os.environ.setdefault("METRICS_SAMPLE_RATE", "0")
+    os.environ.setdefault("METRICS_SLOW_MS", "inf")
+    install_counters()
+    n_containers = args.containers or args.concurrency
+    start = time.perf_counter()
+    containers = [load_container(i) for i in range(n_containers)]
+    print(f"{n_containers} cold starts in {time.perf_counter() - start:.3f}s "
+          f"({(time.perf_counter() - start) / n_containers * 1000:.1f} ms each)")
+
+    adapter = Adapter(("127.0.0.1", 0), containers)
+    threading.Thread(target=adapter.serve_forever, daemon=True).start()
+    port = adapter.server_address[1]
+
+    if args.warmup:
+        Driver(port, events, args.warmup, None, args.concurrency).run()
+    driver = Driver(port, events, args.requests, args.duration, args.concurrency)
+    elapsed = driver.run()
+    adapter.shutdown()
+
+    mean_sql = report(driver.samples, elapsed)
+    if len(standins) > 1 or args.db_compress and standins:
+        # totals since startup, including cold starts and warmup
+        print()
+        for role, standin in standins.items():
+            stats = standin.stats
+            print(f"{role:<7} {stats['commands']:>8} commands "
+                  f"{stats['connects']:>5} connects ({stats['compressed']} compressed) "
+                  f"{stats['bytes_sent']:>11} bytes sent {stats['bytes_received']:>9} received")
+    if args.max_sql_per_request is not None and mean_sql > args.max_sql_per_request:
+        print(f"\nFAIL: {mean_sql:.2f} round trips per request "
+              f"> {args.max_sql_per_request}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,549 @@
+"""In-process MySQL protocol stand-in for the load-test harness.
+
+Speaks just enough of the client/server protocol for PyMySQL and
+lambda_function.py: the v10 handshake (any user/password is accepted),
+COM_QUERY with text result sets, prepared statements (COM_STMT_PREPARE,
+COM_STMT_EXECUTE with binary result sets, COM_STMT_CLOSE), COM_PING,
+COM_INIT_DB, COM_CHANGE_USER, COM_RESET_CONNECTION and COM_QUIT,
+optionally over the compressed protocol (zlib, and zstd when the zstandard
+package or Python 3.14's compression.zstd is available). It
+does not parse SQL. Each statement is matched against the few shapes the
+handler issues and answered with synthetic task rows or an OK packet, so
+the numbers it produces measure the handler and the driver, not a
+database. An optional per-command latency models the network round trip.
+
+    server = StandIn(rows=10000, latency=0.0005).start()
+    os.environ["DB_PORT"] = str(server.port)
+"""
+import datetime
+import re
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+# Protocol constants, spelled out so the stand-in does not depend on pymysql.
+CLIENT_LONG_PASSWORD = 1
+CLIENT_FOUND_ROWS = 1 << 1
+CLIENT_CONNECT_WITH_DB = 1 << 3
+CLIENT_COMPRESS = 1 << 5
+CLIENT_PROTOCOL_41 = 1 << 9
+CLIENT_TRANSACTIONS = 1 << 13
+CLIENT_SECURE_CONNECTION = 1 << 15
+CLIENT_MULTI_RESULTS = 1 << 17
+CLIENT_PLUGIN_AUTH = 1 << 19
+CLIENT_CONNECT_ATTRS = 1 << 20
+CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA = 1 << 21
+CLIENT_DEPRECATE_EOF = 1 << 24
+CLIENT_ZSTD_COMPRESSION_ALGORITHM = 1 << 26
+
+SERVER_CAPABILITIES = (
+    CLIENT_LONG_PASSWORD | CLIENT_FOUND_ROWS | CLIENT_CONNECT_WITH_DB
+    | CLIENT_PROTOCOL_41 | CLIENT_TRANSACTIONS | CLIENT_SECURE_CONNECTION
+    | CLIENT_MULTI_RESULTS | CLIENT_PLUGIN_AUTH | CLIENT_CONNECT_ATTRS
+    | CLIENT_PLUGIN_AUTH_LENENC_CLIENT_DATA | CLIENT_DEPRECATE_EOF
+)
+
+COM_QUIT = 0x01
+COM_INIT_DB = 0x02
+COM_QUERY = 0x03
+COM_PING = 0x0E
+COM_CHANGE_USER = 0x11
+COM_STMT_PREPARE = 0x16
+COM_STMT_EXECUTE = 0x17
+COM_STMT_CLOSE = 0x19
+COM_RESET_CONNECTION = 0x1F
+
+SERVER_STATUS_IN_TRANS = 1
+SERVER_STATUS_AUTOCOMMIT = 2
+
+UTF8MB4 = 255
+BINARY = 63
+
+TYPE_TINY = 1
+TYPE_LONG = 3
+TYPE_DOUBLE = 5
+TYPE_NULL = 6
+TYPE_LONGLONG = 8
+TYPE_DATE = 10
+TYPE_BLOB = 252
+TYPE_VAR_STRING = 253
+
+# (name, type, length, charset) of the tasks table, in SELECT * order.
+TASK_COLUMNS = (
+    ("id", TYPE_LONG, 11, BINARY),
+    ("title", TYPE_VAR_STRING, 255 * 4, UTF8MB4),
+    ("description", TYPE_BLOB, 65535, UTF8MB4),
+    ("due_date", TYPE_DATE, 10, BINARY),
+    ("priority", TYPE_VAR_STRING, 10 * 4, UTF8MB4),
+    ("completed", TYPE_TINY, 1, BINARY),
+)
+TASK_COLUMN_INDEX = {col[0]: i for i, col in enumerate(TASK_COLUMNS)}
+
+WORDS = (
+    "laporan tugas belajar golang data penjualan revisi struct interface "
+    "deploy lambda aurora query index review meeting client invoice bug fix"
+).split()
+PRIORITIES = ("Low", "Medium", "High", None)
+
+_LIMIT = re.compile(r"\bLIMIT\s+(\d+)", re.I)
+_POINT = re.compile(r"\bWHERE\s+id\s*=\s*(\d+)", re.I)
+_SELECT_LIST = re.compile(r"^\s*SELECT\s+(.*?)\s+FROM\s+(\(|\w+)", re.I | re.S)
+_ALIAS = re.compile(r"\bAS\s+(\w+)\s*(?:FROM\b|;|$)", re.I)
+_IN_LIST = re.compile(r"\bIN\s*\(([^)]*)\)", re.I)
+_MIGRATION = re.compile(r"INSERT INTO schema_migrations.*?\((\d+)\)", re.I | re.S)
+_PLACEHOLDER = re.compile(r"\?")
+
+
+def lenenc_int(n):
+    if n < 0xFB:
+        return bytes((n,))
+    if n < 1 << 16:
+        return b"\xfc" + struct.pack("<H", n)
+    if n < 1 << 24:
+        return b"\xfd" + struct.pack("<I", n)[:3]
+    return b"\xfe" + struct.pack("<Q", n)
+
+
+def lenenc_str(b):
+    return lenenc_int(len(b)) + b
+
+
+def task_row(task_id):
+    """Deterministic synthetic task for an id (same id, same row)."""
+    h = task_id * 2654435761 & 0xFFFFFFFF
+    words = [WORDS[(h >> s) % len(WORDS)] for s in (0, 5, 10, 15)]
+    due = None
+    if h % 7:
+        due = datetime.date(2025, 1, 1) + datetime.timedelta(days=h % 365)
+    return (
+        task_id,
+        " ".join(words).title(),
+        " ".join(WORDS[(h >> s) % len(WORDS)] for s in range(0, 24, 2)),
+        due,
+        PRIORITIES[h % len(PRIORITIES)],
+        1 if h % 3 == 0 else 0,
+    )
+
+
+def _text_value(value):
+    if value is None:
+        return b"\xfb"
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    return lenenc_str(str(value).encode("utf-8"))
+
+
+_BINARY_INTS = {TYPE_TINY: "<b", TYPE_LONG: "<i", TYPE_LONGLONG: "<q"}
+
+
+def _binary_row(columns, row):
+    null_bitmap = bytearray((len(columns) + 9) // 8)
+    values = []
+    for i, ((_, type_code, _, _), value) in enumerate(zip(columns, row)):
+        if value is None:
+            null_bitmap[(i + 2) >> 3] |= 1 << ((i + 2) & 7)
+        elif type_code in _BINARY_INTS:
+            values.append(struct.pack(_BINARY_INTS[type_code], value))
+        elif type_code == TYPE_DATE:
+            values.append(struct.pack("<BHBB", 4, value.year, value.month, value.day))
+        else:
+            values.append(lenenc_str(str(value).encode("utf-8")))
+    return b"\x00" + bytes(null_bitmap) + b"".join(values)
+
+
+def _read_lenenc(data, pos):
+    first = data[pos]
+    if first < 0xFB:
+        return first, pos + 1
+    size = {0xFC: 2, 0xFD: 3, 0xFE: 8}[first]
+    return int.from_bytes(data[pos + 1:pos + 1 + size], "little"), pos + 1 + size
+
+
+def _sql_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+class Session(socketserver.BaseRequestHandler):
+    """One client connection."""
+
+    def setup(self):
+        # like mysqld; without it a reply written right after another one
+        # waits for the client's delayed ACK
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.request.makefile("rb")
+        self.seq = 0
+        # compressed protocol: codec (None while uncompressed), sequence id
+        # of the compressed packets and uncompressed bytes not read yet
+        self.codec = None
+        self.cseq = 0
+        self.inbound = b""
+        # CLIENT_DEPRECATE_EOF: no EOF after column definitions, and an OK
+        # packet with the EOF header at the end of a result set
+        self.deprecate_eof = False
+        self.status = SERVER_STATUS_AUTOCOMMIT
+        # statement id -> (sql, parameter count)
+        self.statements = {}
+        self.last_statement_id = 0
+        self.binary = False
+
+    def finish(self):
+        self.rfile.close()
+
+    # -- framing ---------------------------------------------------------
+
+    def read(self, size):
+        if self.codec is None:
+            data = self.rfile.read(size)
+            self.server.count("bytes_received", len(data))
+            return data
+        while len(self.inbound) < size:
+            header = self.rfile.read(7)
+            if len(header) < 7:
+                return b""
+            length = header[0] | header[1] << 8 | header[2] << 16
+            seq = header[3]
+            uncompressed = header[4] | header[5] << 8 | header[6] << 16
+            if seq != self.cseq:
+                raise ConnectionError(f"compressed sequence id {seq}, expected {self.cseq}")
+            self.cseq = (seq + 1) & 0xFF
+            payload = self.rfile.read(length)
+            self.server.count("bytes_received", 7 + len(payload))
+            if uncompressed:
+                payload = self.codec[1](payload)
+            self.inbound += payload
+        data, self.inbound = self.inbound[:size], self.inbound[size:]
+        return data
+
+    def read_packet(self):
+        payload = b""
+        while True:
+            header = self.read(4)
+            if len(header) < 4:
+                return None
+            length = header[0] | header[1] << 8 | header[2] << 16
+            self.seq = (header[3] + 1) & 0xFF
+            payload += self.read(length)
+            # a payload of 16 MB or more continues in the next packet
+            if length < 0xFFFFFF:
+                return payload
+
+    def packet(self, payload):
+        out = struct.pack("<I", len(payload))[:3] + bytes((self.seq,)) + payload
+        self.seq = (self.seq + 1) & 0xFF
+        return out
+
+    def send(self, *payloads):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        data = b"".join(self.packet(p) for p in payloads)
+        if self.codec is not None:
+            frames = []
+            for start in range(0, len(data), 0xFFFFFF):
+                chunk = data[start:start + 0xFFFFFF]
+                uncompressed = 0
+                if len(chunk) >= 50:
+                    compressed = self.codec[0](chunk)
+                    if len(compressed) < len(chunk):
+                        chunk, uncompressed = compressed, len(chunk)
+                frames.append(struct.pack("<I", len(chunk))[:3] + bytes((self.cseq,))
+                              + struct.pack("<I", uncompressed)[:3] + chunk)
+                self.cseq = (self.cseq + 1) & 0xFF
+            data = b"".join(frames)
+        self.server.count("bytes_sent", len(data))
+        self.request.sendall(data)
+
+    def ok(self, affected=0, insert_id=0):
+        return (b"\x00" + lenenc_int(affected) + lenenc_int(insert_id)
+                + struct.pack("<HH", self.status, 0))
+
+    def eof(self):
+        if self.deprecate_eof:
+            return b"\xfe\x00\x00" + struct.pack("<HH", self.status, 0)
+        return b"\xfe" + struct.pack("<HH", 0, self.status)
+
+    def error(self, code, message, state=b"HY000"):
+        return b"\xff" + struct.pack("<H", code) + b"#" + state + message.encode()
+
+    def result_set(self, columns, rows):
+        payloads = [lenenc_int(len(columns))]
+        for name, type_code, length, charset in columns:
+            name = name.encode()
+            payloads.append(
+                lenenc_str(b"def") + lenenc_str(b"")
+                + lenenc_str(b"") + lenenc_str(b"")
+                + lenenc_str(name) + lenenc_str(name)
+                + b"\x0c" + struct.pack("<HIBHBxx", charset, length, type_code, 0, 0)
+            )
+        if not self.deprecate_eof:
+            payloads.append(self.eof())
+        for row in rows:
+            if self.binary:
+                payloads.append(_binary_row(columns, row))
+            else:
+                payloads.append(b"".join(_text_value(v) for v in row))
+        payloads.append(self.eof())
+        return payloads
+
+    # -- connection phase ------------------------------------------------
+
+    def handle(self):
+        salt = b"standin-salt-0123456"
+        self.seq = 0
+        capabilities = SERVER_CAPABILITIES
+        if self.server.compress:
+            capabilities |= CLIENT_COMPRESS
+            if zstd is not None:
+                capabilities |= CLIENT_ZSTD_COMPRESSION_ALGORITHM
+        self.send(
+            b"\x0a" + b"8.0.36-standin\x00"
+            + struct.pack("<I", threading.get_ident() & 0xFFFFFFFF)
+            + salt[:8] + b"\x00"
+            + struct.pack("<HBHHB", capabilities & 0xFFFF, UTF8MB4,
+                          self.status, capabilities >> 16, len(salt) + 1)
+            + b"\x00" * 10 + salt[8:] + b"\x00"
+            + b"mysql_native_password\x00"
+        )
+        response = self.read_packet()
+        if response is None:
+            return
+        self.server.count("connects")
+        self.send(self.ok())
+        client_flag = struct.unpack_from("<I", response)[0] & capabilities
+        self.deprecate_eof = bool(client_flag & CLIENT_DEPRECATE_EOF)
+        if client_flag & CLIENT_ZSTD_COMPRESSION_ALGORITHM:
+            self.codec = (zstd.compress, zstd.decompress)
+            self.server.count("compressed")
+        elif client_flag & CLIENT_COMPRESS:
+            self.codec = (zlib.compress, zlib.decompress)
+            self.server.count("compressed")
+
+        while True:
+            # the compressed sequence id starts over with every command
+            self.cseq = 0
+            data = self.read_packet()
+            if not data or data[0] == COM_QUIT:
+                return
+            self.server.count("commands")
+            command, arg = data[0], data[1:]
+            if command == COM_QUERY:
+                self.send(*self.query(arg.decode("utf-8", "replace")))
+            elif command == COM_STMT_PREPARE:
+                self.send(*self.prepare(arg.decode("utf-8", "replace")))
+            elif command == COM_STMT_EXECUTE:
+                self.send(*self.execute(arg))
+            elif command == COM_STMT_CLOSE:
+                # no reply
+                self.statements.pop(struct.unpack_from("<I", arg)[0], None)
+            elif command in (COM_PING, COM_INIT_DB):
+                self.send(self.ok())
+            elif command == COM_CHANGE_USER or (
+                    command == COM_RESET_CONNECTION and self.server.reset_connection):
+                # any user is accepted; the session goes back to the defaults
+                self.server.count("resets")
+                self.status = SERVER_STATUS_AUTOCOMMIT
+                self.statements.clear()
+                self.send(self.ok())
+            else:
+                self.send(self.error(1047, "Unknown command", b"08S01"))
+
+    # -- prepared statements ---------------------------------------------
+
+    def prepare(self, sql):
+        self.last_statement_id += 1
+        stmt_id = self.last_statement_id
+        params = sql.count("?")
+        self.statements[stmt_id] = (sql, params)
+        # the column count is left at 0: the client gets the columns with
+        # every result set anyway
+        payloads = [b"\x00" + struct.pack("<IHHxH", stmt_id, 0, params, 0)]
+        if params:
+            param = (lenenc_str(b"def") + lenenc_str(b"") * 3 + lenenc_str(b"?") * 2
+                     + b"\x0c" + struct.pack("<HIBHBxx", BINARY, 0, TYPE_VAR_STRING, 0, 0))
+            payloads += [param] * params
+            if not self.deprecate_eof:
+                payloads.append(self.eof())
+        return payloads
+
+    def execute(self, data):
+        stmt_id = struct.unpack_from("<I", data)[0]
+        if stmt_id not in self.statements:
+            return [self.error(1243, "Unknown prepared statement handler")]
+        sql, count = self.statements[stmt_id]
+        args = []
+        if count:
+            pos = 9
+            null_bitmap = data[pos:pos + (count + 7) // 8]
+            pos += len(null_bitmap) + 1
+            types = data[pos:pos + 2 * count:2]
+            pos += 2 * count
+            for i, type_code in enumerate(types):
+                if null_bitmap[i >> 3] & 1 << (i & 7) or type_code == TYPE_NULL:
+                    args.append(None)
+                elif type_code in _BINARY_INTS or type_code == TYPE_DOUBLE:
+                    fmt = _BINARY_INTS.get(type_code, "<d")
+                    args.append(struct.unpack_from(fmt, data, pos)[0])
+                    pos += struct.calcsize(fmt)
+                else:
+                    length, pos = _read_lenenc(data, pos)
+                    args.append(data[pos:pos + length].decode("utf-8", "replace"))
+                    pos += length
+        values = iter(args)
+        sql = _PLACEHOLDER.sub(lambda m: _sql_literal(next(values)), sql)
+        self.binary = True
+        try:
+            return self.query(sql)
+        finally:
+            self.binary = False
+
+    # -- statements ------------------------------------------------------
+
+    def query(self, sql):
+        head = sql.lstrip()[:16].upper()
+        server = self.server
+        if head.startswith("SELECT"):
+            return self.select(sql)
+        if head.startswith("BEGIN") or head.startswith("START"):
+            self.status |= SERVER_STATUS_IN_TRANS
+        elif head.startswith("COMMIT") or head.startswith("ROLLBACK"):
+            self.status &= ~SERVER_STATUS_IN_TRANS
+        elif head.startswith("SET AUTOCOMMIT"):
+            if sql.rstrip().endswith("0"):
+                self.status &= ~SERVER_STATUS_AUTOCOMMIT
+            else:
+                self.status |= SERVER_STATUS_AUTOCOMMIT
+        elif head.startswith("INSERT"):
+            m = _MIGRATION.search(sql)
+            if m:
+                server.schema_version = max(server.schema_version, int(m.group(1)))
+                return [self.ok(1)]
+            if " tasks" in sql[:40]:
+                count = sql.count("),(") + sql.count("), (") + 1
+                return [self.ok(count, server.insert(count))]
+        elif head.startswith("UPDATE") or head.startswith("DELETE"):
+            if " tasks" in sql[:40]:
+                m = _IN_LIST.search(sql)
+                count = m.group(1).count(",") + 1 if m else 1
+                server.bump()
+                return [self.ok(count)]
+        return [self.ok()]
+
+    def scalar(self, sql):
+        """Single row holding 1, e.g. for GET_LOCK() or SELECT 1."""
+        alias = _ALIAS.search(sql)
+        name = alias.group(1) if alias else "1"
+        return self.result_set([(name, TYPE_LONGLONG, 1, BINARY)], [(1,)])
+
+    def select(self, sql):
+        server = self.server
+        upper = sql.upper()
+        if "SCHEMA_MIGRATIONS" in upper:
+            return self.result_set(
+                [("version", TYPE_LONGLONG, 21, BINARY)], [(server.schema_version,)])
+        if "FROM TASK_STATS" in upper:
+            return self.result_set(
+                [("priority", TYPE_VAR_STRING, 50 * 4, UTF8MB4),
+                 ("completed", TYPE_TINY, 1, BINARY),
+                 ("task_count", TYPE_LONGLONG, 20, BINARY)],
+                [(p or "", done, server.rows // 8) for p in PRIORITIES for done in (0, 1)])
+        if "TABLE_VERSIONS" in upper:
+            return self.result_set(
+                [("version", TYPE_LONGLONG, 20, BINARY)], [(server.version,)])
+        m = _SELECT_LIST.match(sql)
+        if not m or (m.group(2) != "(" and m.group(2).lower() != "tasks"):
+            return self.scalar(sql)
+        picks = [c.strip() for c in m.group(1).split(",")]
+        if picks == ["*"]:
+            indexes = list(range(len(TASK_COLUMNS)))
+        else:
+            indexes = [TASK_COLUMN_INDEX[c] for c in picks if c in TASK_COLUMN_INDEX]
+            if not indexes:
+                return self.scalar(sql)
+        columns = [TASK_COLUMNS[i] for i in indexes]
+
+        point = _POINT.search(sql)
+        if point:
+            ids = [int(point.group(1))]
+            ids = [i for i in ids if 0 < i <= server.rows]
+        else:
+            limits = _LIMIT.findall(sql)
+            limit = min(int(limits[-1]), server.rows) if limits else server.rows
+            ids = range(server.rows, server.rows - limit, -1)
+        rows = []
+        for task_id in ids:
+            full = task_row(task_id)
+            rows.append(tuple(full[i] for i in indexes))
+        return self.result_set(columns, rows)
+
+
+class StandIn(socketserver.ThreadingTCPServer):
+    """Threaded stand-in server. ``port=0`` picks a free port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, rows=10000, latency=0.0,
+                 reset_connection=True, compress=False):
+        super().__init__((host, port), Session)
+        self.rows = rows
+        self.latency = latency
+        # False answers COM_RESET_CONNECTION like MySQL before 5.7.3
+        self.reset_connection = reset_connection
+        # offer CLIENT_COMPRESS (and zstd if available)
+        self.compress = compress
+        self.schema_version = 0
+        self.version = 1
+        self.next_id = rows + 1
+        self.stats = {"connects": 0, "commands": 0, "resets": 0, "compressed": 0,
+                      "bytes_sent": 0, "bytes_received": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def insert(self, count):
+        with self._lock:
+            first = self.next_id
+            self.next_id += count
+            self.version += 1
+        return first
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=3307)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StandIn(port=args.port, rows=args.rows, latency=args.latency_ms / 1000)
+    print(f"MySQL stand-in listening on 127.0.0.1:{server.port}")
+    server.serve_forever()
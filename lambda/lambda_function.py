@@ -1,6 +1,17 @@
+import base64
+import datetime
+import gzip
+import hashlib
 import json
 import os
+import random
+import zlib
+import time
+_INIT_STARTED = time.perf_counter()
+from collections import OrderedDict
+from contextlib import contextmanager
 import pymysql
+from pymysql.constants import CLIENT, FIELD_TYPE
 
 # --- Konfigurasi Database dari Environment Variables ---
 DB_HOST     = os.environ.get('DB_HOST')
@@ -8,141 +19,1422 @@ DB_USER     = os.environ.get('DB_USER')
 DB_PASSWORD = os.environ.get('DB_PASSWORD')
 DB_NAME     = os.environ.get('DB_NAME')
 DB_PORT     = int(os.environ.get('DB_PORT', 3306))
+# ping the cached connection at most once per this many seconds
+DB_PING_INTERVAL = float(os.environ.get('DB_PING_INTERVAL', 30))
+# optional read replica (e.g. the Aurora reader endpoint) for GET requests;
+# for CONSISTENCY_WINDOW seconds after a write, reads that must see it still
+# go to DB_HOST
+DB_READER_HOST     = os.environ.get('DB_READER_HOST')
+DB_READER_PORT     = int(os.environ.get('DB_READER_PORT', DB_PORT))
+CONSISTENCY_WINDOW = float(os.environ.get('CONSISTENCY_WINDOW', 5))
+# MySQL compressed protocol: unset (off), "zlib" or "zstd"; zstd falls back to
+# zlib when the server or this runtime lacks it
+DB_COMPRESS          = os.environ.get('DB_COMPRESS') or None
+DB_COMPRESS_MIN_SIZE = int(os.environ.get('DB_COMPRESS_MIN_SIZE', 50))
+
+# --- Pagination ---
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+MAX_PAGE_SIZE     = int(os.environ.get('MAX_PAGE_SIZE', 200))
+
+# --- Per-container task cache ---
+TASK_CACHE_SIZE = int(os.environ.get('TASK_CACHE_SIZE', 1024))
+TASK_CACHE_TTL  = float(os.environ.get('TASK_CACHE_TTL', 30))
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 256))
+SEARCH_CACHE_TTL  = float(os.environ.get('SEARCH_CACHE_TTL', 300))
+
+# --- Response compression ---
+# bodies shorter than this are sent as-is; compression level is 1-9
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+COMPRESS_LEVEL     = int(os.environ.get('COMPRESS_LEVEL', 3))
+
+# --- Bulk endpoints ---
+BULK_MAX_ITEMS       = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+BULK_INSERT_BATCH    = int(os.environ.get('BULK_INSERT_BATCH', 500))
+BULK_DELETE_BATCH    = int(os.environ.get('BULK_DELETE_BATCH', 500))
+BULK_UPDATE_BATCH    = int(os.environ.get('BULK_UPDATE_BATCH', 500))
+BULK_MAX_STMT_LENGTH = int(os.environ.get('BULK_MAX_STMT_LENGTH', 8 * 1024 * 1024))
+
+# --- Idempotency keys ---
+# stored responses are replayed for IDEMPOTENCY_TTL seconds; expired keys are
+# purged at most every IDEMPOTENCY_CLEANUP_INTERVAL seconds per container
+IDEMPOTENCY_TTL              = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+IDEMPOTENCY_CLEANUP_INTERVAL = float(os.environ.get('IDEMPOTENCY_CLEANUP_INTERVAL', 300))
+IDEMPOTENCY_CLEANUP_BATCH    = int(os.environ.get('IDEMPOTENCY_CLEANUP_BATCH', 1000))
+
+# --- Invocation metrics (CloudWatch embedded metric format) ---
+# a METRICS_SAMPLE_RATE share of invocations is logged; cold starts, errors
+# and invocations slower than METRICS_SLOW_MS are always logged
+METRICS_NAMESPACE   = os.environ.get('METRICS_NAMESPACE', 'TaskApi')
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 1.0))
+METRICS_SLOW_MS     = float(os.environ.get('METRICS_SLOW_MS', 1000))
+
+PHASES = ('init', 'connect', 'bootstrap', 'query', 'fetch', 'serialize')
+
+class InvocationMetrics:
+    """Phase timings, round trips and rows for the current invocation.
+
+    Phases are exclusive: entering a phase pauses the enclosing one, so a
+    connect inside the bootstrap is counted as connect only and the phases
+    never add up to more than the invocation. Time outside any phase
+    (routing, validation) is the difference to TotalMs.
+
+    The first invocation of a container is the cold start. Its record also
+    carries what happened during module init (the init phase itself plus
+    the connect and bootstrap done there) and its total starts at init.
+    """
+
+    def __init__(self):
+        self.cold = True
+        self._first = True
+        self._reset()
+        self.started = _INIT_STARTED
+
+    def _reset(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.round_trips = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._stack = []
+
+    def start(self):
+        # the first invocation keeps what module init recorded
+        if self._first:
+            self._first = False
+            return
+        self.cold = False
+        self._reset()
+
+    @property
+    def current(self):
+        return self._stack[-1][0] if self._stack else None
+
+    @contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.phases[outer[0]] += now - outer[1]
+        self._stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, since = self._stack.pop()
+            self.phases[name] += now - since
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def emit(self, route_key, status, request_id=None):
+        """Print one EMF log line, subject to sampling."""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        if not (self.cold or status >= 500 or total_ms >= METRICS_SLOW_MS
+                or random.random() < METRICS_SAMPLE_RATE):
+            return
+        names = [f"{p.capitalize()}Ms" for p in PHASES] + ['TotalMs']
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Route']],
+                    'Metrics': [{'Name': n, 'Unit': 'Milliseconds'} for n in names] + [
+                        {'Name': 'RoundTrips', 'Unit': 'Count'},
+                        {'Name': 'Rows', 'Unit': 'Count'},
+                        {'Name': 'ColdStart', 'Unit': 'Count'},
+                    ],
+                }],
+            },
+            'Route': route_key,
+            'StatusCode': status,
+            'RequestId': request_id,
+            'SampleRate': METRICS_SAMPLE_RATE,
+            'TotalMs': round(total_ms, 3),
+            'RoundTrips': self.round_trips,
+            'Rows': self.rows,
+            'ColdStart': int(self.cold),
+        }
+        for p in PHASES:
+            record[f"{p.capitalize()}Ms"] = round(self.phases[p] * 1000, 3)
+        print(json.dumps(record, separators=(',', ':')))
+
+metrics = InvocationMetrics()
+
+class InstrumentedConnection(pymysql.connections.Connection):
+    """Counts commands sent to the server and times queries into ``metrics``."""
+
+    # set by transaction() so nested blocks join the open transaction
+    in_transaction = False
+    # @@auto_increment_increment, read by auto_increment_step()
+    _auto_increment_step = None
+
+    def _execute_command(self, command, sql):
+        metrics.round_trips += 1
+        return super()._execute_command(command, sql)
+
+    def _send_commands(self, commands):
+        # a pipeline is one round trip, however many statements it holds
+        metrics.round_trips += 1
+        return super()._send_commands(commands)
+
+    def query(self, sql, unbuffered=False):
+        # schema bootstrap statements are part of the bootstrap phase
+        if metrics.current == 'bootstrap':
+            return super().query(sql, unbuffered)
+        with metrics.phase('query'):
+            return super().query(sql, unbuffered)
+
+    def prepare(self, sql):
+        with metrics.phase('query'):
+            return super().prepare(sql)
+
+    def auto_increment_step(self):
+        """Distance between the ids of one multi-row INSERT, read once per connection.
+
+        It is @@auto_increment_increment, which is 1 unless the server is set
+        up for several writers.
+        """
+        if self._auto_increment_step is None:
+            with self.cursor(pymysql.cursors.Cursor) as c:
+                c.execute("SELECT @@auto_increment_increment;")
+                self._auto_increment_step = int(c.fetchone()[0])
+        return self._auto_increment_step
+
+    def execute_prepared(self, stmt, args=(), unbuffered=False):
+        with metrics.phase('query'):
+            return super().execute_prepared(stmt, args, unbuffered)
+
+class ConnectionManager:
+    """Keeps one connection per container and reuses it across warm invocations.
+
+    The connection runs in autocommit mode so a plain SELECT never leaves a
+    transaction (and its snapshot) open between invocations. Liveness is
+    checked with COM_PING, but only when the connection has been idle for
+    longer than ``ping_interval`` seconds.
+    """
+
+    def __init__(self, ping_interval=DB_PING_INTERVAL, **connect_kwargs):
+        self.ping_interval = ping_interval
+        self.connect_kwargs = connect_kwargs
+        self._conn = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        try:
+            self._conn = InstrumentedConnection(autocommit=True, **self.connect_kwargs)
+        except Exception as e:
+            print(f"DB connection error: {e}")
+            raise
+        return self._conn
+
+    def get(self):
+        with metrics.phase('connect'):
+            return self._get()
+
+    def _get(self):
+        now = time.monotonic()
+        conn = self._conn
+        if conn is None or not conn.open:
+            conn = self._connect()
+        elif now - self._last_used >= self.ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception as e:
+                print(f"DB connection lost, reconnecting: {e}")
+                self.discard()
+                conn = self._connect()
+        self._last_used = now
+        return conn
+
+    def recycle(self):
+        """Reset the session of the cached connection after an error.
+
+        COM_RESET_CONNECTION clears whatever the failed request left behind
+        (open transaction, locks, session variables) in one round trip,
+        which is much cheaper than a new connection. If the reset fails, the
+        connection is dropped instead.
+        """
+        conn = self._conn
+        if conn is None or not conn.open:
+            return
+        try:
+            with metrics.phase('connect'):
+                conn.reset_session()
+        except Exception as e:
+            print(f"DB session reset failed, reconnecting next time: {e}")
+            self.discard()
+
+    def discard(self):
+        """Drop the cached connection, e.g. after an error left it in an unknown state."""
+        conn, self._conn = self._conn, None
+        if conn is not None and conn.open:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+_connect_kwargs = dict(
+    user=DB_USER, password=DB_PASSWORD, database=DB_NAME,
+    cursorclass=pymysql.cursors.DictCursor,
+    # rowcount of an UPDATE = matched rows, so "not found" != "unchanged"
+    client_flag=CLIENT.FOUND_ROWS
+)
+# only when asked for, so the default setup also connects with a layer
+# that predates compression support
+if DB_COMPRESS:
+    _connect_kwargs.update(compress=DB_COMPRESS, compress_min_size=DB_COMPRESS_MIN_SIZE)
+db = ConnectionManager(host=DB_HOST, port=DB_PORT, **_connect_kwargs)
+# without a reader endpoint every read goes to the writer
+reader = (ConnectionManager(host=DB_READER_HOST, port=DB_READER_PORT, **_connect_kwargs)
+          if DB_READER_HOST else db)
 
 def get_db_connection():
+    return db.get()
+
+# time.time() of the last successful write handled by this container
+_last_write = 0.0
+
+def consistency_token():
+    """X-Consistency-Token of a write: the time it committed, in milliseconds."""
+    global _last_write
+    _last_write = time.time()
+    return str(int(_last_write * 1000))
+
+def needs_writer(headers):
+    """True if the request carries the X-Consistency-Token of a recent write.
+
+    Aurora replicas usually lag the writer by well under a second, so a
+    token counts for CONSISTENCY_WINDOW seconds. Tokens further than that
+    from the current time, including forged future ones, are ignored.
+    """
     try:
-        return pymysql.connect(
-            host=DB_HOST, user=DB_USER, password=DB_PASSWORD,
-            database=DB_NAME, port=DB_PORT,
-            cursorclass=pymysql.cursors.DictCursor
-        )
-    except Exception as e:
-        print(f"DB connection error: {e}")
-        raise
+        written = int(headers.get('x-consistency-token') or 0) / 1000
+    except ValueError:
+        return False
+    return abs(time.time() - written) < CONSISTENCY_WINDOW
 
-def initialize_db():
-    conn = get_db_connection()
+def read_connection(headers):
+    """Connection for a read-only request: the reader, unless the read must see a recent write."""
+    if reader is db or needs_writer(headers):
+        return db.get()
+    return reader.get()
+
+def replica_may_lag(conn):
+    """True if ``conn`` is a replica that may not have seen this container's last write yet.
+
+    Results read that way must not go into the per-container caches, or
+    they would outlive the replica lag by the cache TTL.
+    """
+    return conn is not db._conn and time.time() - _last_write < CONSISTENCY_WINDOW
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl`` seconds after they are stored.
+
+    ``None`` is a valid value, which lets callers cache negative lookups.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+# task id -> rendered task JSON, or None for a task known not to exist
+task_cache = TTLCache(TASK_CACHE_SIZE, TASK_CACHE_TTL)
+# (ETag, query parameters) -> (body, next cursor, rows); keyed by the ETag, which
+# carries the table version, so any write in any container retires older entries
+search_cache = TTLCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+
+
+# --- Schema migrations ---
+# Ordered (version, statements) steps. Applied steps are recorded in
+# schema_migrations, so append new steps here and never edit old ones.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            due_date DATE,
+            priority VARCHAR(50),
+            completed BOOLEAN DEFAULT FALSE
+        );
+        """,
+    ]),
+    # dummy data for a fresh database only
+    (2, [
+        """
+        INSERT INTO tasks (title,description,due_date,priority,completed)
+        SELECT * FROM (
+            SELECT 'Belajar GoLang','Selesai tutorial','2025-06-15','High',FALSE
+            UNION ALL
+            SELECT 'Laporan Bulanan','Data penjualan Q2','2025-06-20','High',FALSE
+        ) AS seed
+        WHERE NOT EXISTS (SELECT 1 FROM tasks);
+        """,
+    ]),
+    # version counter behind the ETag of GET /tasks; the triggers bump it in
+    # the same statement (and transaction) as every write to tasks. Each
+    # trigger is dropped first, so a step that failed halfway can be re-run.
+    (3, [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name VARCHAR(64) PRIMARY KEY,
+            version BIGINT UNSIGNED NOT NULL
+        );
+        """,
+        "INSERT IGNORE INTO table_versions (name, version) VALUES ('tasks', 1);",
+        "DROP TRIGGER IF EXISTS tasks_version_insert;",
+        """
+        CREATE TRIGGER tasks_version_insert AFTER INSERT ON tasks FOR EACH ROW
+            UPDATE table_versions SET version = version + 1 WHERE name = 'tasks';
+        """,
+        "DROP TRIGGER IF EXISTS tasks_version_update;",
+        """
+        CREATE TRIGGER tasks_version_update AFTER UPDATE ON tasks FOR EACH ROW
+            UPDATE table_versions SET version = version + 1 WHERE name = 'tasks';
+        """,
+        "DROP TRIGGER IF EXISTS tasks_version_delete;",
+        """
+        CREATE TRIGGER tasks_version_delete AFTER DELETE ON tasks FOR EACH ROW
+            UPDATE table_versions SET version = version + 1 WHERE name = 'tasks';
+        """,
+    ]),
+    # indexes behind the GET /tasks filters and sort orders; InnoDB appends
+    # the primary key, so rows with equal due dates are already in id order
+    (4, [
+        """
+        ALTER TABLE tasks
+            ADD INDEX idx_tasks_completed_due (completed, due_date),
+            ADD INDEX idx_tasks_priority_due (priority, due_date),
+            ADD INDEX idx_tasks_due (due_date);
+        """,
+    ]),
+    # counts per (priority, completed) behind GET /tasks/stats, kept up to
+    # date by triggers like table_versions (and dropped first like them). The
+    # backfill runs after the triggers exist and overwrites whatever they
+    # counted in the meantime.
+    (5, [
+        """
+        CREATE TABLE IF NOT EXISTS task_stats (
+            priority VARCHAR(50) NOT NULL,
+            completed BOOLEAN NOT NULL,
+            task_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (priority, completed)
+        );
+        """,
+        "DROP TRIGGER IF EXISTS tasks_stats_insert;",
+        """
+        CREATE TRIGGER tasks_stats_insert AFTER INSERT ON tasks FOR EACH ROW
+            INSERT INTO task_stats (priority, completed, task_count)
+            VALUES (COALESCE(NEW.priority, ''), COALESCE(NEW.completed, 0) <> 0, 1)
+            ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+        """,
+        "DROP TRIGGER IF EXISTS tasks_stats_update;",
+        """
+        CREATE TRIGGER tasks_stats_update AFTER UPDATE ON tasks FOR EACH ROW
+        BEGIN
+            IF NOT (COALESCE(OLD.priority, '') = COALESCE(NEW.priority, '')
+                    AND (COALESCE(OLD.completed, 0) <> 0) = (COALESCE(NEW.completed, 0) <> 0)) THEN
+                UPDATE task_stats SET task_count = task_count - 1
+                WHERE priority = COALESCE(OLD.priority, '')
+                  AND completed = (COALESCE(OLD.completed, 0) <> 0);
+                INSERT INTO task_stats (priority, completed, task_count)
+                VALUES (COALESCE(NEW.priority, ''), COALESCE(NEW.completed, 0) <> 0, 1)
+                ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+            END IF;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS tasks_stats_delete;",
+        """
+        CREATE TRIGGER tasks_stats_delete AFTER DELETE ON tasks FOR EACH ROW
+            UPDATE task_stats SET task_count = task_count - 1
+            WHERE priority = COALESCE(OLD.priority, '')
+              AND completed = (COALESCE(OLD.completed, 0) <> 0);
+        """,
+        """
+        INSERT INTO task_stats (priority, completed, task_count)
+        SELECT COALESCE(priority, ''), COALESCE(completed, 0) <> 0, COUNT(*)
+        FROM tasks
+        GROUP BY COALESCE(priority, ''), COALESCE(completed, 0) <> 0
+        ON DUPLICATE KEY UPDATE task_count = VALUES(task_count);
+        """,
+    ]),
+    # full-text index behind GET /tasks?q=; the first FULLTEXT index on an
+    # InnoDB table rebuilds it once to add the hidden FTS_DOC_ID column
+    (6, [
+        "ALTER TABLE tasks ADD FULLTEXT INDEX ft_tasks_title_description (title, description);",
+    ]),
+    # responses of writes sent with an Idempotency-Key header, keyed by the
+    # SHA-256 of the key; request_hash catches a key reused for another request
+    (7, [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key_hash BINARY(32) PRIMARY KEY,
+            request_hash BINARY(32) NOT NULL,
+            status_code SMALLINT NOT NULL,
+            response_body MEDIUMTEXT NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            INDEX idx_idempotency_expires (expires_at)
+        );
+        """,
+    ]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+SCHEMA_LOCK_TIMEOUT = 30
+
+# highest migration known to be applied; checked once per container
+_schema_version = 0
+
+def _applied_schema_version(c):
     try:
+        c.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_migrations;")
+    except pymysql.err.ProgrammingError as e:
+        # the ER table is only loaded when needed (fresh database)
+        from pymysql.constants import ER
+        if e.args[0] != ER.NO_SUCH_TABLE:
+            raise
+        return 0
+    return c.fetchone()['version']
+
+def initialize_db():
+    global _schema_version
+    if _schema_version >= SCHEMA_VERSION:
+        return
+    with metrics.phase('bootstrap'):
+        conn = get_db_connection()
         with conn.cursor() as c:
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    title VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    due_date DATE,
-                    priority VARCHAR(50),
-                    completed BOOLEAN DEFAULT FALSE
-                );
-            """)
-            c.execute("SELECT COUNT(*) AS cnt FROM tasks;")
-            if c.fetchone()['cnt'] == 0:
-                dummy = [
-                    ("Belajar GoLang","Selesai tutorial","2025-06-15","High",False),
-                    ("Laporan Bulanan","Data penjualan Q2","2025-06-20","High",False),
-                ]
-                c.executemany(
-                    "INSERT INTO tasks (title,description,due_date,priority,completed) VALUES (%s,%s,%s,%s,%s);",
-                    dummy
-                )
-                conn.commit()
-    finally:
-        conn.close()
+            version = _applied_schema_version(c)
+            if version < SCHEMA_VERSION:
+                # serialize concurrent cold starts; the loser re-reads the version
+                c.execute("SELECT GET_LOCK('tasks_schema', %s) AS locked;", (SCHEMA_LOCK_TIMEOUT,))
+                if not c.fetchone()['locked']:
+                    raise RuntimeError("Timed out waiting for the schema migration lock")
+                try:
+                    c.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_migrations (
+                            version INT PRIMARY KEY,
+                            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        );
+                    """)
+                    version = _applied_schema_version(c)
+                    for step, statements in MIGRATIONS:
+                        if step <= version:
+                            continue
+                        for sql in statements:
+                            c.execute(sql)
+                        c.execute("INSERT INTO schema_migrations (version) VALUES (%s);", (step,))
+                        version = step
+                finally:
+                    c.execute("SELECT RELEASE_LOCK('tasks_schema');")
+        _schema_version = version
 
-def get_all_tasks():
-    conn = get_db_connection()
+def raw_json_response(status, body, headers=None):
+    return {
+        'statusCode': status,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': body
+    }
+
+def json_response(status, payload, headers=None):
+    with metrics.phase('serialize'):
+        body = json.dumps(payload, default=str)
+    return raw_json_response(status, body, headers)
+
+# --- Row rendering ---
+# Result rows are read as tuples and rendered straight to JSON text with one
+# precompiled serializer per column, instead of building a dict per row and
+# letting json.dumps fall back to default=str for every date.
+_encode_str = json.encoder.encode_basestring_ascii
+
+_INT_TYPES = {
+    FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG,
+    FIELD_TYPE.LONGLONG, FIELD_TYPE.INT24, FIELD_TYPE.YEAR,
+}
+_TEMPORAL_TYPES = {
+    FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP,
+}
+_STRING_TYPES = {
+    FIELD_TYPE.VARCHAR, FIELD_TYPE.VAR_STRING, FIELD_TYPE.STRING, FIELD_TYPE.ENUM,
+    FIELD_TYPE.TINY_BLOB, FIELD_TYPE.BLOB, FIELD_TYPE.MEDIUM_BLOB, FIELD_TYPE.LONG_BLOB,
+}
+
+def _encode_bool(v):
+    return 'true' if v else 'false'
+
+def _encode_temporal(v):
+    return _encode_str(v.isoformat())
+
+def _encode_text(v):
+    return _encode_str(v if isinstance(v, str) else v.decode('utf-8', 'replace'))
+
+def _encode_other(v):
+    return json.dumps(v, default=str)
+
+def _column_encoder(type_code, length):
+    if type_code == FIELD_TYPE.TINY and length == 1:
+        # BOOLEAN is TINYINT(1)
+        return _encode_bool
+    if type_code in _INT_TYPES:
+        return int.__repr__
+    if type_code in (FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE):
+        return float.__repr__
+    if type_code in _TEMPORAL_TYPES:
+        return _encode_temporal
+    if type_code in _STRING_TYPES:
+        return _encode_text
+    return _encode_other
+
+_row_renderers = {}
+
+def row_renderer(description):
+    """Return a function that renders one result tuple as a JSON object string.
+
+    The function is generated once per distinct cursor.description: it
+    unpacks the row into locals and concatenates constant key prefixes with
+    the per-column encoders, so there is no per-row loop over the columns.
+    """
+    render = _row_renderers.get(description)
+    if render is None:
+        names = [f"v{i}" for i in range(len(description))]
+        env = {}
+        parts = []
+        for i, col in enumerate(description):
+            env[f"e{i}"] = _column_encoder(col[1], col[3])
+            key = ('{' if i == 0 else ',') + _encode_str(col[0]) + ':'
+            parts.append(f"{key!r} + ('null' if v{i} is None else e{i}(v{i}))")
+        src = (
+            f"def render(row):\n"
+            f"    {', '.join(names)}, = row\n"
+            f"    return {' + '.join(parts)} + '}}'\n"
+        )
+        exec(src, env)
+        render = _row_renderers[description] = env['render']
+    return render
+
+def _parse_id_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError(f"{name} must be positive")
+    return value
+
+TASKS_VERSION_SQL = "SELECT version FROM table_versions WHERE name = 'tasks';"
+
+def tasks_version(c, execute=True):
+    """The tasks table version; ``execute=False`` reads it from a cursor that already ran TASKS_VERSION_SQL."""
+    if execute:
+        c.execute(TASKS_VERSION_SQL)
+    row = c.fetchone()
+    return row[0] if row else 0
+
+def _preferred_encoding(accept_encoding):
+    """Pick gzip or deflate from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    for coding in ('gzip', 'deflate'):
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+def compress_response(response, accept_encoding):
+    """Compress bodies of at least COMPRESS_MIN_BYTES when the client accepts it.
+
+    The compressed body is returned base64-encoded with isBase64Encoded set;
+    API Gateway decodes it because the API declares binary media types.
+    """
+    body = response.get('body')
+    if response.get('isBase64Encoded') or not body or len(body) < COMPRESS_MIN_BYTES:
+        return response
+    headers = dict(response.get('headers') or {}, Vary='Accept-Encoding')
+    response['headers'] = headers
+    encoding = _preferred_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    data = body.encode('utf-8')
+    if encoding == 'gzip':
+        data = gzip.compress(data, COMPRESS_LEVEL, mtime=0)
+    else:
+        # HTTP "deflate" is the zlib format, not raw deflate
+        data = zlib.compress(data, COMPRESS_LEVEL)
+    headers['Content-Encoding'] = encoding
+    response['body'] = base64.b64encode(data).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
+
+def _etag_matches(etag, if_none_match):
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+# sort parameter -> (column, descending); ties are always broken by id
+SORT_ORDERS = {
+    '-id': ('id', True),
+    'id': ('id', False),
+    'due_date': ('due_date', False),
+    '-due_date': ('due_date', True),
+}
+DEFAULT_SORT = '-id'
+MAX_PRIORITY_FILTER = 10
+
+def _parse_bool_param(params, name):
+    value = (params.get(name) or '').lower()
+    if not value:
+        return None
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+def _parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
     try:
-        with conn.cursor() as c:
-            c.execute("SELECT * FROM tasks ORDER BY id DESC;")
-            tasks = c.fetchall()
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps(tasks, default=str)
-        }
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)") from None
+
+def _list_filters(params, today):
+    """WHERE clauses for the filter parameters of GET /tasks.
+
+    Every filter is served by one of the indexes from migration 4.
+    ``overdue`` compares with ``today``, the date that list_etag() puts into
+    the ETag, rather than with the database's CURDATE().
+    """
+    clauses, args = [], []
+    completed = _parse_bool_param(params, 'completed')
+    if completed is not None:
+        clauses.append("completed = %s")
+        args.append(completed)
+    if params.get('priority'):
+        priorities = [p.strip() for p in params['priority'].split(',') if p.strip()]
+        if not priorities:
+            raise ValueError("priority must name at least one priority")
+        if len(priorities) > MAX_PRIORITY_FILTER:
+            raise ValueError(f"At most {MAX_PRIORITY_FILTER} priorities")
+        clauses.append("priority IN (" + ",".join(["%s"] * len(priorities)) + ")")
+        args.extend(priorities)
+    due_from = _parse_date_param(params, 'due_from')
+    if due_from:
+        clauses.append("due_date >= %s")
+        args.append(due_from)
+    due_to = _parse_date_param(params, 'due_to')
+    if due_to:
+        clauses.append("due_date <= %s")
+        args.append(due_to)
+    if _parse_bool_param(params, 'overdue'):
+        clauses.append("completed = FALSE AND due_date < %s")
+        args.append(today)
+    return clauses, args
+
+def list_etag(version, params, today):
+    """Weak ETag of a list or search page: the tasks table version.
+
+    An overdue=true page also changes at midnight without any write, so its
+    ETag carries the date as well.
+    """
+    if _parse_bool_param(params, 'overdue'):
+        return f'W/"{version}-{today.isoformat()}"'
+    return f'W/"{version}"'
+
+def _keyset_condition(column, desc, anchor_value, anchor_id):
+    """Condition for rows strictly after (anchor_value, anchor_id) in list order.
+
+    MySQL sorts NULLs first ascending and last descending, so a NULL anchor
+    needs its own branches.
+    """
+    if column == 'id':
+        return ("id < %s" if desc else "id > %s"), [anchor_id]
+    id_op = '<' if desc else '>'
+    if anchor_value is None:
+        if desc:
+            return f"({column} IS NULL AND id < %s)", [anchor_id]
+        return f"(({column} IS NULL AND id > %s) OR {column} IS NOT NULL)", [anchor_id]
+    sql = f"({column} {id_op} %s OR ({column} = %s AND id {id_op} %s)"
+    if desc:
+        sql += f" OR {column} IS NULL"
+    return sql + ")", [anchor_value, anchor_value, anchor_id]
+
+def get_all_tasks(params, headers):
+    """One page of tasks using keyset pagination, newest first by default.
+
+    ``after_id`` returns the rows that follow that task in list order,
+    ``before_id`` the rows that precede it. The page size is capped at
+    MAX_PAGE_SIZE; cursors for the neighbouring pages are returned in the
+    X-Next-Cursor / X-Prev-Cursor headers as ids to pass back as after_id /
+    before_id. Filters (completed, priority, due_from, due_to, overdue) and
+    the whitelisted SORT_ORDERS can be combined with either cursor.
+
+    The ETag is the tasks table version. It is read before the rows, so a
+    concurrent write can only make the ETag older than the body, never newer,
+    and If-None-Match is answered with 304 without running the list query.
+    Requests without If-None-Match (and without an anchor whose sort value
+    has to be looked up) send the version read and the list query as one
+    pipeline, in a single round trip.
+    """
+    try:
+        limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+        after_id = _parse_id_param(params, 'after_id')
+        before_id = _parse_id_param(params, 'before_id')
+    except ValueError:
+        return json_response(400, {'message': 'limit, after_id and before_id must be integers'})
+    if limit < 1:
+        return json_response(400, {'message': 'limit must be positive'})
+    if after_id and before_id:
+        return json_response(400, {'message': 'Use either after_id or before_id, not both'})
+    limit = min(limit, MAX_PAGE_SIZE)
+    sort = params.get('sort') or DEFAULT_SORT
+    if sort not in SORT_ORDERS:
+        return json_response(400, {'message': 'sort must be one of ' + ', '.join(SORT_ORDERS)})
+    column, desc = SORT_ORDERS[sort]
+    today = datetime.date.today()
+    try:
+        clauses, args = _list_filters(params, today)
+    except ValueError as e:
+        return json_response(400, {'message': str(e)})
+
+    conn = read_connection(headers)
+    anchor_id = after_id or before_id
+    anchor_value = None
+    # the page query needs the anchor's sort value, unless it sorts by id
+    anchor_lookup = anchor_id and column != 'id'
+    pipe = None
+    if headers.get('if-none-match') or anchor_lookup:
+        with conn.cursor(pymysql.cursors.Cursor) as c:
+            etag = list_etag(tasks_version(c), params, today)
+            if _etag_matches(etag, headers.get('if-none-match')):
+                return {
+                    'statusCode': 304,
+                    'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'},
+                    'body': ''
+                }
+            if anchor_lookup:
+                c.execute(f"SELECT {column} FROM tasks WHERE id = %s;", (anchor_id,))
+                row = c.fetchone()
+                if row is None:
+                    return json_response(400, {'message': 'Cursor task no longer exists'})
+                anchor_value = row[0]
+    else:
+        # nothing to compare the ETag with: read the version in the same
+        # round trip as the page, still before the rows
+        pipe = conn.pipeline()
+        version_cursor = pipe.execute(TASKS_VERSION_SQL, cursor=pymysql.cursors.Cursor)
+
+    # a before_id page is the next page in reverse order, flipped back
+    scan_desc = desc != bool(before_id)
+    if anchor_id:
+        cond, cond_args = _keyset_condition(column, scan_desc, anchor_value, anchor_id)
+        clauses, args = clauses + [cond], args + cond_args
+    where = " AND ".join(clauses) or "TRUE"
+
+    def order_by(descending):
+        direction = 'DESC' if descending else 'ASC'
+        if column == 'id':
+            return f"id {direction}"
+        return f"{column} {direction}, id {direction}"
+
+    # fetch one extra row to know whether another page exists
+    sql = f"SELECT * FROM tasks WHERE {where} ORDER BY {order_by(scan_desc)} LIMIT %s"
+    if before_id:
+        sql = f"SELECT * FROM ({sql}) AS page ORDER BY {order_by(desc)}"
+    # unbuffered tuples: rows are decoded and rendered one at a time
+    if pipe is None:
+        c = conn.cursor(pymysql.cursors.SSCursor)
+        c.execute(sql + ";", args + [limit + 1])
+    else:
+        c = pipe.execute(sql + ";", args + [limit + 1], cursor=pymysql.cursors.SSCursor)
+        with metrics.phase('query'):
+            pipe.run()
+        etag = list_etag(tasks_version(version_cursor, execute=False), params, today)
+    with c:
+        # rows are rendered as they arrive, so fetch includes rendering
+        with metrics.phase('fetch'):
+            render = row_renderer(c.description)
+            id_col = [col[0] for col in c.description].index('id')
+            ids, rendered = [], []
+            for row in c.fetchall_unbuffered():
+                ids.append(row[id_col])
+                rendered.append(render(row))
+
+    if before_id:
+        has_prev, has_next = len(ids) > limit, True
+        ids, rendered = ids[-limit:], rendered[-limit:]
+    else:
+        has_prev, has_next = after_id is not None, len(ids) > limit
+        ids, rendered = ids[:limit], rendered[:limit]
+    headers = {
+        'ETag': etag,
+        'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor, X-Prev-Cursor'
+    }
+    if ids and has_next:
+        headers['X-Next-Cursor'] = str(ids[-1])
+    if ids and has_prev:
+        headers['X-Prev-Cursor'] = str(ids[0])
+    metrics.rows += len(ids)
+    return raw_json_response(200, '[' + ','.join(rendered) + ']', headers)
+
+SEARCH_MATCH = "MATCH(title, description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+MAX_SEARCH_LENGTH = 200
+
+def search_tasks(params, headers):
+    """Full-text search of ``q`` in title and description, best match first.
+
+    The WHERE clause is answered by the FULLTEXT index, so the work depends
+    on how many tasks match rather than on the table size. Results are
+    ordered by (relevance, id) and paged with ``after_id`` like the list;
+    the anchor's relevance is recomputed by primary key. The other list
+    filters can be combined with ``q``; ``sort`` and ``before_id`` cannot.
+
+    Pages are cached per container under the tasks table version, which is
+    read first anyway for the ETag, so a hit costs one primary-key read.
+    """
+    q = params['q'].strip()
+    if len(q) > MAX_SEARCH_LENGTH:
+        return json_response(400, {'message': f'q is limited to {MAX_SEARCH_LENGTH} characters'})
+    if params.get('sort') or params.get('before_id'):
+        return json_response(400, {'message': 'Search results are ordered by relevance; page with after_id'})
+    try:
+        limit = min(int(params.get('limit') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        after_id = _parse_id_param(params, 'after_id')
+    except ValueError:
+        return json_response(400, {'message': 'limit and after_id must be integers'})
+    if limit < 1:
+        return json_response(400, {'message': 'limit must be positive'})
+    today = datetime.date.today()
+    try:
+        clauses, args = _list_filters(params, today)
+    except ValueError as e:
+        return json_response(400, {'message': str(e)})
+
+    conn = read_connection(headers)
+    with conn.cursor(pymysql.cursors.Cursor) as c:
+        version = tasks_version(c)
+        etag = list_etag(version, params, today)
+        if _etag_matches(etag, headers.get('if-none-match')):
+            return {
+                'statusCode': 304,
+                'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'},
+                'body': ''
+            }
+        key = (etag, tuple(sorted(params.items())))
+        cached = search_cache.get(key)
+        if cached is None:
+            if after_id:
+                c.execute(f"SELECT {SEARCH_MATCH} FROM tasks WHERE id = %s;", (q, after_id))
+                row = c.fetchone()
+                if row is None:
+                    return json_response(400, {'message': 'Cursor task no longer exists'})
+                clauses = clauses + [f"({SEARCH_MATCH} < %s OR ({SEARCH_MATCH} = %s AND id < %s))"]
+                args = args + [q, row[0], q, row[0], after_id]
+            where = " AND ".join([SEARCH_MATCH] + clauses)
+            c.execute(
+                f"SELECT * FROM tasks WHERE {where} ORDER BY {SEARCH_MATCH} DESC, id DESC LIMIT %s;",
+                [q] + args + [q, limit + 1]
+            )
+            rows = c.fetchall()
+            with metrics.phase('serialize'):
+                render = row_renderer(c.description)
+                id_col = [col[0] for col in c.description].index('id')
+                page = rows[:limit]
+                body = '[' + ','.join(render(row) for row in page) + ']'
+            next_cursor = str(page[-1][id_col]) if len(rows) > limit else None
+            cached = (body, next_cursor, len(page))
+            search_cache.set(key, cached)
+
+    body, next_cursor, count = cached
+    headers = {
+        'ETag': etag,
+        'Access-Control-Expose-Headers': 'ETag, X-Next-Cursor, X-Prev-Cursor'
+    }
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    metrics.rows += count
+    return raw_json_response(200, body, headers)
+
+def get_task(task_id, headers):
+    # the cache holds the rendered JSON, so hits skip serialization too;
+    # a read after the client's own write skips it, the entry may be older
+    task = _MISSING if needs_writer(headers) else task_cache.get(task_id, _MISSING)
+    if task is _MISSING:
+        conn = read_connection(headers)
+        with conn.cursor(pymysql.cursors.PreparedCursor) as c:
+            c.execute("SELECT * FROM tasks WHERE id=%s;", (task_id,))
+            row = c.fetchone()
+            with metrics.phase('serialize'):
+                task = row_renderer(c.description)(row) if row else None
+        if not replica_may_lag(conn):
+            task_cache.set(task_id, task)
+    if task is None:
+        return json_response(404, {'message': 'Not found'})
+    metrics.rows += 1
+    return raw_json_response(200, task)
+
+def get_task_stats(headers):
+    """Task counts overall, per completed state and per priority.
+
+    Reads the few rows of task_stats, which the triggers from migration 5
+    update in the same statement as every write, so the cost does not grow
+    with the number of tasks. Tasks without a priority are counted under
+    "none".
+    """
+    conn = read_connection(headers)
+    with conn.cursor(pymysql.cursors.Cursor) as c:
+        c.execute("SELECT priority, completed, task_count FROM task_stats WHERE task_count <> 0;")
+        rows = c.fetchall()
+    stats = {'total': 0, 'completed': 0, 'open': 0, 'priority': {}}
+    for priority, completed, count in rows:
+        state = 'completed' if completed else 'open'
+        bucket = stats['priority'].setdefault(priority or 'none', {'total': 0, 'completed': 0, 'open': 0})
+        for counts in (stats, bucket):
+            counts['total'] += count
+            counts[state] += count
+    return json_response(200, stats)
+
+INSERT_TASK_SQL = "INSERT INTO tasks (title,description,due_date,priority,completed) VALUES (%s,%s,%s,%s,%s);"
+
+def _task_values(data):
+    return (data['title'], data.get('description'), data.get('due_date'), data.get('priority'), data.get('completed', False))
+
+@contextmanager
+def transaction(conn):
+    """Run the block in an explicit transaction on the autocommit connection.
+
+    A block nested in another transaction() on the same connection joins the
+    outer transaction, which commits or rolls back the whole unit.
+    """
+    if conn.in_transaction:
+        yield
+        return
+    with metrics.phase('query'):
+        conn.begin()
+    conn.in_transaction = True
+    try:
+        yield
+        with metrics.phase('query'):
+            conn.commit()
+    except BaseException:
+        with metrics.phase('query'):
+            conn.rollback()
+        raise
     finally:
-        conn.close()
+        conn.in_transaction = False
 
 def create_task(body):
     data = json.loads(body)
+    if isinstance(data, list):
+        return create_tasks(data)
     if not data.get('title'):
         return {'statusCode':400,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Title is required'})}
     conn = get_db_connection()
-    try:
-        with conn.cursor() as c:
-            c.execute(
-                "INSERT INTO tasks (title,description,due_date,priority,completed) VALUES (%s,%s,%s,%s,%s);",
-                (data['title'], data.get('description'), data.get('due_date'), data.get('priority'), data.get('completed', False))
-            )
-            conn.commit()
-            new_id = c.lastrowid
-        return {
-            'statusCode': 201,
-            'headers': {'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},
-            'body': json.dumps({'id': new_id})
-        }
-    finally:
-        conn.close()
+    with conn.cursor(pymysql.cursors.PreparedCursor) as c:
+        c.execute(INSERT_TASK_SQL, _task_values(data))
+        new_id = c.lastrowid
+    # the id may be cached as a miss from an earlier lookup
+    task_cache.invalidate(new_id)
+    return {
+        'statusCode': 201,
+        'headers': {'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},
+        'body': json.dumps({'id': new_id})
+    }
+
+def create_tasks(items):
+    """Bulk insert: every BULK_INSERT_BATCH rows become one multi-row INSERT.
+
+    All batches run in one transaction. A multi-row INSERT gets a block of
+    auto-increment ids starting at lastrowid, auto_increment_step() apart, so
+    the generated ids are rebuilt from lastrowid and the size of each batch.
+    That only holds while executemany() keeps a batch in a single statement,
+    hence the raised max_stmt_length (it must stay below the server's
+    max_allowed_packet).
+    """
+    if not items:
+        return json_response(400, {'message': 'No tasks to create'})
+    if len(items) > BULK_MAX_ITEMS:
+        return json_response(413, {'message': f'At most {BULK_MAX_ITEMS} tasks per request'})
+    for i, data in enumerate(items):
+        if not isinstance(data, dict) or not data.get('title'):
+            return json_response(400, {'message': f'Title is required (item {i})'})
+
+    ids = []
+    conn = get_db_connection()
+    step = conn.auto_increment_step()
+    with transaction(conn), conn.cursor() as c:
+        c.max_stmt_length = BULK_MAX_STMT_LENGTH
+        for start in range(0, len(items), BULK_INSERT_BATCH):
+            batch = items[start:start + BULK_INSERT_BATCH]
+            c.executemany(INSERT_TASK_SQL, [_task_values(data) for data in batch])
+            ids.extend(range(c.lastrowid, c.lastrowid + len(batch) * step, step))
+    for new_id in ids:
+        task_cache.invalidate(new_id)
+    return json_response(201, {'ids': ids})
+
+UPDATABLE_FIELDS = ('title', 'description', 'due_date', 'priority', 'completed')
 
 def update_task(task_id, body):
+    """Partial update: only the fields present in the body are written.
+
+    A single UPDATE both writes and detects a missing row; the connection
+    uses CLIENT.FOUND_ROWS so rowcount counts matched rather than changed
+    rows, and an update that changes nothing is still a 200.
+    """
     data = json.loads(body)
+    fields = [f for f in UPDATABLE_FIELDS if f in data]
+    if not fields:
+        return json_response(400, {'message': 'No fields to update'})
+    if 'title' in data and not data['title']:
+        return json_response(400, {'message': 'Title is required'})
+    task_cache.invalidate(task_id)
     conn = get_db_connection()
-    try:
-        with conn.cursor() as c:
-            c.execute("SELECT * FROM tasks WHERE id=%s;", (task_id,))
-            existing = c.fetchone()
-            if not existing:
-                return {'statusCode':404,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Not found'})}
-            # fill fields
-            title       = data.get('title', existing['title'])
-            description = data.get('description', existing['description'])
-            due_date    = data.get('due_date', str(existing['due_date']))
-            priority    = data.get('priority', existing['priority'])
-            completed   = data.get('completed', existing['completed'])
+    with conn.cursor(pymysql.cursors.PreparedCursor) as c:
+        c.execute(
+            "UPDATE tasks SET " + ",".join(f"{f}=%s" for f in fields) + " WHERE id=%s;",
+            [data[f] for f in fields] + [task_id]
+        )
+        if c.rowcount == 0:
+            return json_response(404, {'message': 'Not found'})
+    return json_response(200, {'message': 'OK'})
+
+def delete_task(task_id):
+    task_cache.invalidate(task_id)
+    conn = get_db_connection()
+    with conn.cursor(pymysql.cursors.PreparedCursor) as c:
+        c.execute("DELETE FROM tasks WHERE id=%s;", (task_id,))
+        if c.rowcount == 0:
+            return {'statusCode':404,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Not found'})}
+    return {'statusCode':204,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':''}
+
+def delete_tasks(body):
+    """Bulk delete by id, BULK_DELETE_BATCH ids per DELETE ... WHERE id IN (...)."""
+    data = json.loads(body or 'null')
+    ids = data.get('ids') if isinstance(data, dict) else data
+    if not isinstance(ids, list) or not ids:
+        return json_response(400, {'message': 'Body must be a non-empty list of ids or {"ids": [...]}'})
+    if len(ids) > BULK_MAX_ITEMS:
+        return json_response(413, {'message': f'At most {BULK_MAX_ITEMS} ids per request'})
+    if not all(type(i) is int for i in ids):
+        return json_response(400, {'message': 'Invalid ID'})
+    ids = list(dict.fromkeys(ids))
+
+    deleted = 0
+    conn = get_db_connection()
+    with transaction(conn), conn.cursor() as c:
+        for start in range(0, len(ids), BULK_DELETE_BATCH):
+            batch = ids[start:start + BULK_DELETE_BATCH]
             c.execute(
-                "UPDATE tasks SET title=%s,description=%s,due_date=%s,priority=%s,completed=%s WHERE id=%s;",
-                (title, description, due_date, priority, completed, task_id)
+                "DELETE FROM tasks WHERE id IN (" + ",".join(["%s"] * len(batch)) + ");",
+                batch
             )
-            conn.commit()
-        return {'statusCode':200,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'OK'})}
-    finally:
-        conn.close()
+            deleted += c.rowcount
+    for task_id in ids:
+        task_cache.invalidate(task_id)
+    return json_response(200, {'deleted': deleted})
+
+# --- Idempotency keys ---
+IDEMPOTENT_METHODS = ('POST', 'PUT', 'PATCH')
+WRITE_METHODS = IDEMPOTENT_METHODS + ('DELETE',)
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# monotonic time of this container's last purge of expired keys
+_idempotency_cleaned = 0.0
+
+def _purge_expired_keys(c):
+    global _idempotency_cleaned
+    now = time.monotonic()
+    if now - _idempotency_cleaned < IDEMPOTENCY_CLEANUP_INTERVAL:
+        return
+    _idempotency_cleaned = now
+    c.execute(
+        "DELETE FROM idempotency_keys WHERE expires_at < NOW() LIMIT %s;",
+        (IDEMPOTENCY_CLEANUP_BATCH,)
+    )
+
+def idempotent_write(key, method, path, body, handler):
+    """Run ``handler`` at most once per Idempotency-Key and replay its response.
+
+    A repeat is answered from one primary-key read of idempotency_keys. A
+    first request runs the write and stores the key with its response in the
+    same transaction, so either both are committed or neither is. Two
+    concurrent requests with the same key both run the write, but the second
+    INSERT of the key waits for the first transaction and then fails on the
+    primary key, which rolls back the second write; its response is then
+    replayed from the first. Server errors are not stored, so such a request
+    can be retried under the same key.
+    """
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        return json_response(400, {'message': f'Idempotency-Key is longer than {MAX_IDEMPOTENCY_KEY_LENGTH} characters'})
+    key_hash = hashlib.sha256(key.encode('utf-8')).digest()
+    request_hash = hashlib.sha256(f"{method} {path}\n{body}".encode('utf-8')).digest()
+
+    def replay(c):
+        c.execute(
+            "SELECT request_hash = %s, status_code, response_body, expires_at > NOW() "
+            "FROM idempotency_keys WHERE key_hash=%s;",
+            (request_hash, key_hash)
+        )
+        row = c.fetchone()
+        if row is None:
+            return None, False
+        same_request, status, stored_body, live = row
+        if not live:
+            return None, True
+        if not same_request:
+            return json_response(422, {'message': 'Idempotency-Key was already used for a different request'}), True
+        metrics.rows += 1
+        return raw_json_response(status, stored_body, {'Idempotent-Replayed': 'true'}), True
 
-def delete_task(task_id):
     conn = get_db_connection()
+    with conn.cursor(pymysql.cursors.Cursor) as c:
+        response, exists = replay(c)
+    if response is not None:
+        return response
+
+    try:
+        with transaction(conn), conn.cursor(pymysql.cursors.Cursor) as c:
+            if exists:
+                # expired but not purged yet
+                c.execute("DELETE FROM idempotency_keys WHERE key_hash=%s AND expires_at <= NOW();", (key_hash,))
+            response = handler()
+            if response['statusCode'] < 500:
+                c.execute(
+                    "INSERT INTO idempotency_keys (key_hash, request_hash, status_code, response_body, expires_at) "
+                    "VALUES (%s, %s, %s, %s, NOW() + INTERVAL %s SECOND);",
+                    (key_hash, request_hash, response['statusCode'], response['body'], IDEMPOTENCY_TTL)
+                )
+    except pymysql.err.IntegrityError as e:
+        from pymysql.constants import ER
+        if e.args[0] != ER.DUP_ENTRY:
+            raise
+        # a concurrent request with the same key committed first
+        with conn.cursor(pymysql.cursors.Cursor) as c:
+            response, _ = replay(c)
+        if response is None:
+            raise
+        return response
+
     try:
         with conn.cursor() as c:
-            c.execute("DELETE FROM tasks WHERE id=%s;", (task_id,))
-            conn.commit()
-            if c.rowcount == 0:
-                return {'statusCode':404,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Not found'})}
-        return {'statusCode':204,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':''}
+            _purge_expired_keys(c)
+    except pymysql.err.MySQLError as e:
+        print(f"Idempotency key cleanup failed: {e}")
+    return response
+
+# --- Queued writes (SQS) ---
+# Message bodies: {"op": "create", "task": {...}}, {"op": "update", "id": 1,
+# "task": {...}} or {"op": "delete", "id": 1}.
+TASK_OPS = ('create', 'update', 'delete')
+
+def _parse_task_message(body):
+    """(op, task_id, fields) of one queued write; ValueError if it is invalid."""
+    msg = json.loads(body)
+    if not isinstance(msg, dict) or msg.get('op') not in TASK_OPS:
+        raise ValueError("'op' must be one of " + ', '.join(TASK_OPS))
+    op, task = msg['op'], msg.get('task') or {}
+    if not isinstance(task, dict):
+        raise ValueError("'task' must be an object")
+    if op == 'create':
+        if not task.get('title'):
+            raise ValueError('Title is required')
+        return op, None, task
+    task_id = msg.get('id')
+    if type(task_id) is not int:
+        raise ValueError('Invalid ID')
+    if op == 'delete':
+        return op, task_id, None
+    fields = {f: task[f] for f in UPDATABLE_FIELDS if f in task}
+    if not fields:
+        raise ValueError('No fields to update')
+    if 'title' in fields and not fields['title']:
+        raise ValueError('Title is required')
+    return op, task_id, fields
+
+def _apply_task_writes(c, messages):
+    """Write parsed messages grouped by operation, in as few statements as possible.
+
+    Creates become multi-row INSERTs, updates one UPDATE with a CASE per
+    column and deletes one DELETE ... IN per batch of ids. Updates to the
+    same task are merged in message order. Updates and deletes of tasks
+    that no longer exist are no-ops, like a repeated DELETE /tasks/{id}.
+    """
+    creates = [fields for op, _, fields in messages if op == 'create']
+    updates = {}
+    for op, task_id, fields in messages:
+        if op == 'update':
+            updates.setdefault(task_id, {}).update(fields)
+    deletes = list(dict.fromkeys(task_id for op, task_id, _ in messages if op == 'delete'))
+
+    touched = []
+    c.max_stmt_length = BULK_MAX_STMT_LENGTH
+    step = c.connection.auto_increment_step() if creates else 1
+    for start in range(0, len(creates), BULK_INSERT_BATCH):
+        batch = creates[start:start + BULK_INSERT_BATCH]
+        c.executemany(INSERT_TASK_SQL, [_task_values(data) for data in batch])
+        touched.extend(range(c.lastrowid, c.lastrowid + len(batch) * step, step))
+
+    update_ids = list(updates)
+    for start in range(0, len(update_ids), BULK_UPDATE_BATCH):
+        batch = update_ids[start:start + BULK_UPDATE_BATCH]
+        sets, args = [], []
+        for f in UPDATABLE_FIELDS:
+            ids = [i for i in batch if f in updates[i]]
+            if ids:
+                sets.append(f"{f}=CASE id" + " WHEN %s THEN %s" * len(ids) + f" ELSE {f} END")
+                for i in ids:
+                    args += [i, updates[i][f]]
+        c.execute(
+            "UPDATE tasks SET " + ",".join(sets) +
+            " WHERE id IN (" + ",".join(["%s"] * len(batch)) + ");",
+            args + batch
+        )
+
+    for start in range(0, len(deletes), BULK_DELETE_BATCH):
+        batch = deletes[start:start + BULK_DELETE_BATCH]
+        c.execute("DELETE FROM tasks WHERE id IN (" + ",".join(["%s"] * len(batch)) + ");", batch)
+
+    for task_id in touched + update_ids + deletes:
+        task_cache.invalidate(task_id)
+
+def sqs_handler(event, context):
+    """Entry point for batches of queued task writes from SQS.
+
+    The whole batch is written in one transaction. If that fails, the
+    messages are retried one transaction each so a single bad message
+    cannot fail the others. Invalid messages and messages that still fail
+    are reported in batchItemFailures (the event source mapping needs
+    ReportBatchItemFailures). SQS redelivers them until they end up in the
+    dead-letter queue.
+    """
+    metrics.start()
+    status = 500
+    try:
+        failures, parsed = [], []
+        for record in event.get('Records') or []:
+            try:
+                parsed.append((record['messageId'], _parse_task_message(record['body'])))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Rejected message {record.get('messageId')}: {e}")
+                failures.append(record.get('messageId'))
+
+        rejected = len(failures)
+        if parsed:
+            try:
+                initialize_db()
+                conn = get_db_connection()
+                with transaction(conn), conn.cursor() as c:
+                    _apply_task_writes(c, [msg for _, msg in parsed])
+            except pymysql.err.MySQLError as e:
+                print(f"Batch write failed, retrying messages one by one: {e}")
+                for message_id, msg in parsed:
+                    try:
+                        conn = get_db_connection()
+                        with transaction(conn), conn.cursor() as c:
+                            _apply_task_writes(c, [msg])
+                    except pymysql.err.MySQLError as e:
+                        print(f"Write failed for message {message_id}: {e}")
+                        failures.append(message_id)
+
+        metrics.rows += len(parsed) - (len(failures) - rejected)
+        status = 200
+        return {'batchItemFailures': [{'itemIdentifier': m} for m in failures]}
+    except Exception:
+        db.recycle()
+        raise
     finally:
-        conn.close()
+        metrics.emit('SQS tasks', status, getattr(context, 'aws_request_id', None))
 
-def lambda_handler(event, context):
+def route(event):
     # event['path'] bisa mengandung stage prefix => ambil bagian sesudah domain
     path = event.get('rawPath') or event.get('path') or ''
     method = event.get('httpMethod')
     body   = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    params = event.get('queryStringParameters') or {}
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
     initialize_db()
 
+    key = headers.get('idempotency-key')
+    if key and method in IDEMPOTENT_METHODS:
+        response = idempotent_write(
+            key, method, path, body,
+            lambda: dispatch(method, path, body, params, headers)
+        )
+    else:
+        response = dispatch(method, path, body, params, headers)
+    if method in WRITE_METHODS and response['statusCode'] < 400:
+        response['headers']['X-Consistency-Token'] = consistency_token()
+        response['headers']['Access-Control-Expose-Headers'] = 'X-Consistency-Token'
+    return response
+
+def dispatch(method, path, body, params, headers):
     parts = [p for p in path.split('/') if p]
     # /tasks
     if len(parts) == 1 and parts[0] == 'tasks':
         if method == 'GET':
-            return get_all_tasks()
+            if (params.get('q') or '').strip():
+                return search_tasks(params, headers)
+            return get_all_tasks(params, headers)
         if method == 'POST':
             return create_task(body)
+        if method == 'DELETE':
+            return delete_tasks(body)
+    # /tasks/stats
+    if parts == ['tasks', 'stats'] and method == 'GET':
+        return get_task_stats(headers)
     # /tasks/{id}
     if len(parts) == 2 and parts[0] == 'tasks':
         try:
             tid = int(parts[1])
         except:
             return {'statusCode':400,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Invalid ID'})}
-        if method == 'PUT':
+        if method == 'GET':
+            return get_task(tid, headers)
+        if method in ('PUT', 'PATCH'):
             return update_task(tid, body)
         if method == 'DELETE':
             return delete_task(tid)
@@ -152,9 +1444,50 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'headers': {
                 'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
+                'Access-Control-Allow-Methods': 'GET,POST,PUT,PATCH,DELETE,OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type,If-None-Match,Idempotency-Key,X-Consistency-Token'
             },
             'body': ''
         }
     return {'statusCode':404,'headers':{'Content-Type':'application/json','Access-Control-Allow-Origin':'*'},'body':json.dumps({'message':'Not Found'})}
+
+def _route_key(event):
+    """Low-cardinality route name for the metrics dimension."""
+    parts = [p for p in (event.get('rawPath') or event.get('path') or '').split('/') if p]
+    if not parts or parts[0] != 'tasks' or len(parts) > 2:
+        return f"{event.get('httpMethod')} other"
+    if len(parts) == 2 and parts[1].isdigit():
+        parts[1] = '{id}'
+    return f"{event.get('httpMethod')} /" + '/'.join(parts)
+
+def lambda_handler(event, context):
+    metrics.start()
+    status = 500
+    try:
+        try:
+            response = route(event)
+        except Exception:
+            # the connection may be mid-result or mid-transaction; start clean next time
+            db.recycle()
+            if reader is not db:
+                reader.recycle()
+            raise
+        accept_encoding = next(
+            (v for k, v in (event.get('headers') or {}).items() if k.lower() == 'accept-encoding'), None
+        )
+        with metrics.phase('serialize'):
+            response = compress_response(response, accept_encoding)
+        status = response['statusCode']
+        return response
+    finally:
+        metrics.emit(_route_key(event), status, getattr(context, 'aws_request_id', None))
+
+# Open the connections and bring the schema up to date during the init phase,
+# so the first request doesn't pay for either. Failures are retried lazily.
+try:
+    initialize_db()
+    reader.get()
+except Exception as e:
+    print(f"DB init error: {e}")
+# whatever module init spent outside connect/bootstrap
+metrics.phases['init'] = time.perf_counter() - _INIT_STARTED - sum(metrics.phases.values())
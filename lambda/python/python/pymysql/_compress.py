@@ -0,0 +1,130 @@
+"""
+Compressed client/server protocol (CLIENT_COMPRESS, and
+CLIENT_ZSTD_COMPRESSION_ALGORITHM since MySQL 8.0.18).
+
+Every write is wrapped in compressed packets: a 7 byte header (compressed
+length, sequence id, uncompressed length) followed by the zlib or zstd
+compressed payload, or by the payload as is when it is short or does not
+shrink, in which case the uncompressed length is 0. The payload carries
+ordinary MySQL packets, so the layers above are unchanged.
+
+https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_basic_compression.html
+
+This module is imported only by connections that use compression.
+"""
+
+import struct
+import zlib
+
+#: Largest payload of one compressed packet.
+MAX_PAYLOAD_LEN = 2**24 - 1
+
+
+class ZlibCodec:
+    name = "zlib"
+    default_level = 6
+
+    def __init__(self, level=None):
+        self.level = self.default_level if level is None else level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data, size):
+        return zlib.decompress(data, bufsize=size)
+
+
+class ZstdCodec:
+    """
+    zstd from ``compression.zstd`` (Python 3.14+) or the ``zstandard``
+    package.
+
+    :raise ImportError: If neither is available.
+    """
+
+    name = "zstd"
+    default_level = 3
+
+    def __init__(self, level=None):
+        self.level = self.default_level if level is None else level
+        try:
+            from compression import zstd
+        except ImportError:
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            decompressor = zstandard.ZstdDecompressor()
+            self.compress = compressor.compress
+            self.decompress = lambda data, size: decompressor.decompress(
+                data, max_output_size=size
+            )
+        else:
+            self.compress = lambda data: zstd.compress(data, level=self.level)
+            self.decompress = lambda data, size: zstd.decompress(data)
+
+
+class CompressedPackets:
+    """
+    Framing state of one compressed connection.
+
+    The sequence id counts compressed packets in both directions and starts
+    over with every command, independently of the sequence ids of the
+    packets inside.
+    """
+
+    def __init__(self, codec, min_size=50):
+        self.codec = codec
+        self.min_size = min_size
+        self.seq = 0
+        self._buffer = bytearray()
+        self._pos = 0
+
+    def pack(self, data):
+        """Wrap ``data`` in compressed packets."""
+        out = []
+        for start in range(0, len(data), MAX_PAYLOAD_LEN):
+            chunk = data[start : start + MAX_PAYLOAD_LEN]
+            uncompressed_len = 0
+            if len(chunk) >= self.min_size:
+                compressed = self.codec.compress(chunk)
+                if len(compressed) < len(chunk):
+                    uncompressed_len = len(chunk)
+                    chunk = compressed
+            out.append(
+                struct.pack("<I", len(chunk))[:3]
+                + bytes((self.seq,))
+                + struct.pack("<I", uncompressed_len)[:3]
+            )
+            out.append(chunk)
+            self.seq = (self.seq + 1) % 256
+        return b"".join(out)
+
+    def buffered(self):
+        """Number of uncompressed bytes received but not read yet."""
+        return len(self._buffer) - self._pos
+
+    def feed(self, payload, uncompressed_len):
+        """
+        Add the payload of a received compressed packet.
+
+        :raise ValueError: If the payload does not decompress to
+            ``uncompressed_len`` bytes.
+        :raise zlib.error: If the payload is corrupt (other errors for zstd).
+        """
+        if uncompressed_len:
+            payload = self.codec.decompress(payload, uncompressed_len)
+            if len(payload) != uncompressed_len:
+                raise ValueError(
+                    f"expected {uncompressed_len} bytes, got {len(payload)}"
+                )
+        if self._pos:
+            del self._buffer[: self._pos]
+            self._pos = 0
+        self._buffer += payload
+
+    def read(self, num_bytes):
+        """Take ``num_bytes`` buffered bytes; the caller checks buffered() first."""
+        end = self._pos + num_bytes
+        data = bytes(self._buffer[self._pos : end])
+        self._pos = end
+        return data
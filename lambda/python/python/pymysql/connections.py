@@ -2,21 +2,23 @@
 # http://dev.mysql.com/doc/internals/en/client-server-protocol.html
 # Error codes:
 # https://dev.mysql.com/doc/refman/5.5/en/error-handling.html
+from collections import OrderedDict
+import datetime
+from decimal import Decimal
 import errno
 import os
 import socket
 import struct
 import sys
-import traceback
+import time
 import warnings
 
 from . import _auth
 
 from .charset import charset_by_name, charset_by_id
-from .constants import CLIENT, COMMAND, CR, ER, FIELD_TYPE, SERVER_STATUS
+from .constants import CLIENT, COMMAND, CR, FIELD_TYPE, FLAG, SERVER_STATUS
 from . import converters
 from .cursors import Cursor
-from .optionfile import Parser
 from .protocol import (
     dump_packet,
     MysqlPacket,
@@ -27,22 +29,40 @@ from .protocol import (
 )
 from . import err, VERSION_STRING
 
-try:
-    import ssl
+# ssl, getpass, optionfile (configparser), traceback and the ER table are
+# imported where they are used. Most connections need none of them, and
+# importing them eagerly is a large share of the time "import pymysql" takes
+# on a cold start.
 
-    SSL_ENABLED = True
-except ImportError:
-    ssl = None
-    SSL_ENABLED = False
+_default_user = False
 
-try:
-    import getpass
 
-    DEFAULT_USER = getpass.getuser()
-    del getpass
-except (ImportError, KeyError):
-    # KeyError occurs when there's no entry in OS database for a current user.
-    DEFAULT_USER = None
+def _get_default_user():
+    global _default_user
+    if _default_user is False:
+        try:
+            import getpass
+
+            _default_user = getpass.getuser()
+        except (ImportError, KeyError):
+            # KeyError occurs when there's no entry in OS database for a current user.
+            _default_user = None
+    return _default_user
+
+
+def __getattr__(name):
+    # DEFAULT_USER and SSL_ENABLED used to be computed at import time; they
+    # are still available, computed on first access
+    if name == "DEFAULT_USER":
+        return _get_default_user()
+    if name == "SSL_ENABLED":
+        try:
+            import ssl  # noqa: F401
+        except ImportError:
+            return False
+        return True
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 DEBUG = False
 
@@ -88,6 +108,74 @@ def _lenenc_int(i):
         )
 
 
+def _pack_time(negative, days, seconds, microseconds):
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if microseconds:
+        return struct.pack(
+            "<BBIBBBI", 12, negative, days, hours, minutes, seconds, microseconds
+        )
+    return struct.pack("<BBIBBB", 8, negative, days, hours, minutes, seconds)
+
+
+def _binary_param(value, encoding):
+    """
+    Encode a COM_STMT_EXECUTE parameter.
+
+    Returns the field type, the flags byte (0x80 for unsigned) and the value
+    in the binary protocol. None is handled by the caller (NULL bitmap).
+    """
+    if isinstance(value, bool):
+        return FIELD_TYPE.TINY, 0, b"\x01" if value else b"\x00"
+    if isinstance(value, int):
+        if -(1 << 63) <= value < (1 << 63):
+            return FIELD_TYPE.LONGLONG, 0, struct.pack("<q", value)
+        if 0 <= value < (1 << 64):
+            return FIELD_TYPE.LONGLONG, 0x80, struct.pack("<Q", value)
+        value = str(value).encode("ascii")
+        return FIELD_TYPE.NEWDECIMAL, 0, _lenenc_int(len(value)) + value
+    if isinstance(value, float):
+        return FIELD_TYPE.DOUBLE, 0, struct.pack("<d", value)
+    if isinstance(value, str):
+        value = value.encode(encoding, "surrogateescape")
+        return FIELD_TYPE.VAR_STRING, 0, _lenenc_int(len(value)) + value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        return FIELD_TYPE.BLOB, 0, _lenenc_int(len(value)) + value
+    if isinstance(value, Decimal):
+        value = str(value).encode("ascii")
+        return FIELD_TYPE.NEWDECIMAL, 0, _lenenc_int(len(value)) + value
+    if isinstance(value, time.struct_time):
+        value = datetime.datetime(*value[:6])
+    if isinstance(value, datetime.datetime):
+        fields = (
+            value.year,
+            value.month,
+            value.day,
+            value.hour,
+            value.minute,
+            value.second,
+        )
+        if value.microsecond:
+            data = struct.pack("<BHBBBBBI", 11, *fields, value.microsecond)
+        else:
+            data = struct.pack("<BHBBBBB", 7, *fields)
+        return FIELD_TYPE.DATETIME, 0, data
+    if isinstance(value, datetime.date):
+        data = struct.pack("<BHBB", 4, value.year, value.month, value.day)
+        return FIELD_TYPE.DATE, 0, data
+    if isinstance(value, datetime.timedelta):
+        negative = value < datetime.timedelta(0)
+        if negative:
+            value = -value
+        data = _pack_time(negative, value.days, value.seconds, value.microseconds)
+        return FIELD_TYPE.TIME, 0, data
+    if isinstance(value, datetime.time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second
+        return FIELD_TYPE.TIME, 0, _pack_time(0, 0, seconds, value.microsecond)
+    raise TypeError(f"{type(value).__name__} can not be used as parameter")
+
+
 class Connection:
     """
     Representation of a socket with a mysql server.
@@ -151,7 +239,18 @@ class Connection:
         (if no authenticate method) for returning a string from the user. (experimental)
     :param server_public_key: SHA256 authentication plugin public key value. (default: None)
     :param binary_prefix: Add _binary prefix on bytes and bytearray. (default: False)
-    :param compress: Not supported.
+    :param prepared_cache_size: Number of server-side prepared statements kept
+        open per connection by :meth:`prepare`; the least recently used one
+        is closed beyond that. (default: 64)
+    :param compress: Use the compressed protocol: ``"zlib"`` (or True), or
+        ``"zstd"``, which needs MySQL 8.0.18+ and ``compression.zstd``
+        (Python 3.14+) or the zstandard package and falls back to zlib
+        otherwise. Without server support the connection is uncompressed.
+        (default: None)
+    :param compress_level: Compression level, None for the default of the
+        algorithm (zlib: 6, zstd: 3).
+    :param compress_min_size: Packets shorter than this many bytes are sent
+        uncompressed. (default: 50)
     :param named_pipe: Not supported.
     :param db: **DEPRECATED** Alias for database.
     :param passwd: **DEPRECATED** Alias for password.
@@ -164,6 +263,8 @@ class Connection:
     _auth_plugin_name = ""
     _closed = False
     _secure = False
+    # CompressedPackets while the compressed protocol is in use
+    _compression = None
 
     def __init__(
         self,
@@ -204,7 +305,10 @@ class Connection:
         ssl_key_password=None,
         ssl_verify_cert=None,
         ssl_verify_identity=None,
-        compress=None,  # not supported
+        prepared_cache_size=64,
+        compress=None,
+        compress_level=None,
+        compress_min_size=50,
         named_pipe=None,  # not supported
         passwd=None,  # deprecated
         db=None,  # deprecated
@@ -222,10 +326,15 @@ class Connection:
             # )
             password = passwd
 
-        if compress or named_pipe:
-            raise NotImplementedError(
-                "compress and named_pipe arguments are not supported"
-            )
+        if named_pipe:
+            raise NotImplementedError("named_pipe argument is not supported")
+        if compress is True:
+            compress = "zlib"
+        if compress not in (None, False, "zlib", "zstd"):
+            raise ValueError("compress should be 'zlib', 'zstd', True or None")
+        self.compress = compress or None
+        self.compress_level = compress_level
+        self.compress_min_size = compress_min_size
 
         self._local_infile = bool(local_infile)
         if self._local_infile:
@@ -241,6 +350,8 @@ class Connection:
             if not read_default_group:
                 read_default_group = "client"
 
+            from .optionfile import Parser
+
             cfg = Parser()
             cfg.read(os.path.expanduser(read_default_file))
 
@@ -285,8 +396,6 @@ class Connection:
                 if ssl_key_password is not None:
                     ssl["password"] = ssl_key_password
             if ssl:
-                if not SSL_ENABLED:
-                    raise NotImplementedError("ssl module not found")
                 self.ssl = True
                 client_flag |= CLIENT.SSL
                 self.ctx = self._create_ssl_ctx(ssl)
@@ -295,7 +404,7 @@ class Connection:
         self.port = port or 3306
         if type(self.port) is not int:
             raise ValueError("port should be of type int")
-        self.user = user or DEFAULT_USER
+        self.user = user or _get_default_user()
         self.password = password or b""
         if isinstance(self.password, str):
             self.password = self.password.encode("latin1")
@@ -345,6 +454,11 @@ class Connection:
         self._auth_plugin_map = auth_plugin_map or {}
         self._binary_prefix = binary_prefix
         self.server_public_key = server_public_key
+        if prepared_cache_size < 1:
+            raise ValueError("prepared_cache_size should be >= 1")
+        self.prepared_cache_size = prepared_cache_size
+        # SQL text -> PreparedStatement, least recently used first
+        self._prepared = OrderedDict()
 
         self._connect_attrs = {
             "_client_name": "pymysql",
@@ -368,6 +482,11 @@ class Connection:
         self.close()
 
     def _create_ssl_ctx(self, sslp):
+        try:
+            import ssl
+        except ImportError:
+            raise NotImplementedError("ssl module not found")
+
         if isinstance(sslp, ssl.SSLContext):
             return sslp
         ca = sslp.get("ca")
@@ -416,6 +535,8 @@ class Connection:
         if self._sock is None:
             return
         send_data = struct.pack("<iB", 1, COMMAND.COM_QUIT)
+        if self._compression is not None:
+            self._compression.seq = 0
         try:
             self._write_bytes(send_data)
         except Exception:
@@ -553,6 +674,15 @@ class Connection:
             return cursor(self)
         return self.cursorclass(self)
 
+    def pipeline(self):
+        """
+        Create a :class:`~pymysql.pipeline.Pipeline` that runs several
+        statements in one network round trip.
+        """
+        from .pipeline import Pipeline
+
+        return Pipeline(self)
+
     # The following methods are INTERNAL USE ONLY (called from Cursor)
     def query(self, sql, unbuffered=False):
         # if DEBUG:
@@ -564,9 +694,110 @@ class Connection:
         return self._affected_rows
 
     def next_result(self, unbuffered=False):
-        self._affected_rows = self._read_query_result(unbuffered=unbuffered)
+        # results of a prepared CALL all use the binary protocol
+        binary = isinstance(self._result, BinaryResult)
+        self._affected_rows = self._read_query_result(
+            unbuffered=unbuffered, binary=binary
+        )
+        return self._affected_rows
+
+    def prepare(self, sql):
+        """
+        Prepare a statement on the server (COM_STMT_PREPARE).
+
+        Statements are cached per connection by their SQL text, so preparing
+        the same text again costs no round trip. Beyond ``prepared_cache_size``
+        statements the least recently used one is closed on the server.
+
+        :param sql: Statement with ``?`` placeholders.
+        :return: The prepared statement.
+        :rtype: PreparedStatement
+        """
+        stmt = self._prepared.get(sql)
+        if stmt is not None:
+            self._prepared.move_to_end(sql)
+            return stmt
+
+        data = sql
+        if isinstance(data, str):
+            data = data.encode(self.encoding, "surrogateescape")
+        self._execute_command(COMMAND.COM_STMT_PREPARE, data)
+        # https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_com_stmt_prepare.html
+        packet = self._read_packet()
+        statement_id, field_count, param_count = packet.read_struct("<xIHH")
+        # parameter and column definitions, each followed by an EOF packet
+        # unless CLIENT_DEPRECATE_EOF is on; the columns are sent again with
+        # every result set
+        eof = 0 if self.client_flag & CLIENT.DEPRECATE_EOF else 1
+        if param_count:
+            for _ in range(param_count + eof):
+                self._read_packet()
+        if field_count:
+            for _ in range(field_count + eof):
+                self._read_packet()
+
+        stmt = PreparedStatement(sql, statement_id, param_count, field_count)
+        self._prepared[sql] = stmt
+        while len(self._prepared) > self.prepared_cache_size:
+            _, old = self._prepared.popitem(last=False)
+            self.close_prepared(old)
+        return stmt
+
+    def close_prepared(self, stmt):
+        """Deallocate a prepared statement on the server (COM_STMT_CLOSE)."""
+        if self._prepared.get(stmt.sql) is stmt:
+            del self._prepared[stmt.sql]
+        if self._sock is not None:
+            # the server sends no reply
+            self._execute_command(
+                COMMAND.COM_STMT_CLOSE, struct.pack("<I", stmt.statement_id)
+            )
+
+    def execute_prepared(self, stmt, args=(), unbuffered=False):
+        """
+        Execute a prepared statement (COM_STMT_EXECUTE).
+
+        The arguments are sent in the binary protocol without any escaping,
+        and result rows come back in the binary protocol as well.
+
+        :param stmt: Statement returned by :meth:`prepare`.
+        :param args: One value per placeholder.
+        :return: Number of affected rows.
+
+        :raise ProgrammingError: If the number of arguments is wrong.
+        """
+        self._execute_command(
+            COMMAND.COM_STMT_EXECUTE, self._stmt_execute_payload(stmt, args)
+        )
+        self._affected_rows = self._read_query_result(
+            unbuffered=unbuffered, binary=True
+        )
         return self._affected_rows
 
+    def _stmt_execute_payload(self, stmt, args):
+        if len(args) != stmt.param_count:
+            raise err.ProgrammingError(
+                f"Statement takes {stmt.param_count} arguments, {len(args)} given"
+            )
+        # no cursor, iteration count 1
+        data = struct.pack("<IBI", stmt.statement_id, 0, 1)
+        if args:
+            null_bitmap = bytearray((len(args) + 7) // 8)
+            types = bytearray()
+            values = []
+            for i, value in enumerate(args):
+                if value is None:
+                    null_bitmap[i >> 3] |= 1 << (i & 7)
+                    types += b"\x06\x00"  # FIELD_TYPE.NULL
+                    continue
+                type_code, flags, value = _binary_param(value, self.encoding)
+                types.append(type_code)
+                types.append(flags)
+                values.append(value)
+            # the 1 is new-params-bound: types are sent with every execution
+            data += bytes(null_bitmap) + b"\x01" + bytes(types) + b"".join(values)
+        return data
+
     def affected_rows(self):
         return self._affected_rows
 
@@ -600,6 +831,115 @@ class Connection:
             else:
                 raise
 
+    def _session_sql(self):
+        """SET statement for the session settings made by :meth:`connect`."""
+        names = f"NAMES {self.charset}"
+        if self.collation:
+            names += f" COLLATE {self.collation}"
+        assignments = [names]
+        if self.sql_mode is not None:
+            assignments.append("sql_mode=%s" % self.escape(self.sql_mode))
+        if self.autocommit_mode is not None:
+            assignments.append("autocommit=%d" % self.autocommit_mode)
+        return "SET " + ", ".join(assignments)
+
+    def _run_init_command(self):
+        if self.init_command is not None:
+            c = self.cursor()
+            c.execute(self.init_command)
+            c.close()
+
+    def reset_session(self):
+        """
+        Reset the session state without reconnecting or authenticating again.
+
+        Sends COM_RESET_CONNECTION: the server rolls back an open transaction,
+        drops temporary tables, releases locks and clears user variables and
+        prepared statements. Session variables fall back to their global
+        values, so a SET restoring the charset, collation, sql_mode and
+        autocommit mode of this connection is sent right behind it, and both
+        replies are read in a single network round trip. ``init_command``, if
+        any, runs again afterwards.
+
+        Servers without COM_RESET_CONNECTION (before MySQL 5.7.3 and
+        MariaDB 10.2.4) get :meth:`change_user` with the current user instead.
+
+        :raise InterfaceError: If the connection is closed.
+        """
+        self._execute_command(COMMAND.COM_RESET_CONNECTION, b"")
+        self._prepared.clear()
+        # pipelined: each reply carries sequence number 1
+        self._execute_command(COMMAND.COM_QUERY, self._session_sql())
+        try:
+            self._read_ok_packet()
+        except err.MySQLError as e:
+            reset_error = e
+        else:
+            reset_error = None
+        if self._sock is None:
+            raise reset_error
+        self._next_seq_id = 1
+        if self._compression is not None:
+            self._compression.seq = 1
+        self._read_ok_packet()
+        if reset_error is not None:
+            from .constants import ER
+
+            if reset_error.args[0] != ER.UNKNOWN_COM_ERROR:
+                raise reset_error
+            self.change_user()
+            return
+        self._run_init_command()
+
+    def change_user(self, user=None, password=None, database=None):
+        """
+        Switch the user and default database with COM_CHANGE_USER.
+
+        The session state is reset as with :meth:`reset_session`, and the
+        new credentials are authenticated, which takes at least one more
+        round trip than :meth:`reset_session` but no new TCP connection or
+        handshake. With no arguments the current user and database are kept.
+
+        :param user: User to switch to. (default: current user)
+        :param password: Password of that user. (default: current password)
+        :param database: New default database. (default: current database)
+
+        :raise OperationalError: If authentication fails; the server closes
+            the connection in that case.
+        """
+        if user is not None:
+            self.user = user
+        if isinstance(self.user, str):
+            self.user = self.user.encode(self.encoding)
+        if password is not None:
+            self.password = password
+        if isinstance(self.password, str):
+            self.password = self.password.encode("latin1")
+        if database is not None:
+            self.db = database
+        if isinstance(self.db, str):
+            self.db = self.db.encode(self.encoding)
+
+        plugin_name, authresp = self._scramble()
+        data = self.user + b"\0"
+        if self.server_capabilities & CLIENT.SECURE_CONNECTION:
+            data += struct.pack("B", len(authresp)) + authresp
+        else:  # pragma: no cover - not testing against servers without secure auth (>=5.0)
+            data += authresp + b"\0"
+        data += (self.db or b"") + b"\0"
+        data += struct.pack("<H", charset_by_name(self.charset).id)
+        if self.server_capabilities & CLIENT.PLUGIN_AUTH:
+            data += (plugin_name or b"") + b"\0"
+        if self.server_capabilities & CLIENT.CONNECT_ATTRS:
+            data += self._connect_attrs_data()
+
+        self._execute_command(COMMAND.COM_CHANGE_USER, data)
+        self._prepared.clear()
+        self._finish_authentication(self._read_packet())
+        self._execute_command(COMMAND.COM_QUERY, self._session_sql())
+        self._read_ok_packet()
+        self._run_init_command()
+
     def set_charset(self, charset):
         """Deprecated. Use set_character_set() instead."""
         # This function has been implemented in old PyMySQL.
@@ -630,6 +970,9 @@ class Connection:
 
     def connect(self, sock=None):
         self._closed = False
+        self._compression = None
+        # statements prepared on an earlier connection are gone
+        self._prepared.clear()
         try:
             if sock is None:
                 if self.unix_socket:
@@ -710,6 +1053,8 @@ class Connection:
                 )
                 # Keep original exception and traceback to investigate error.
                 exc.original_exception = e
+                import traceback
+
                 exc.traceback = traceback.format_exc()
                 if DEBUG:
                     print(exc.traceback)
@@ -746,7 +1091,9 @@ class Connection:
 
             btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
             bytes_to_read = btrl + (btrh << 16)
-            if packet_number != self._next_seq_id:
+            # with compression only the compressed packets' sequence ids are
+            # checked, as the server does
+            if packet_number != self._next_seq_id and self._compression is None:
                 self._force_close()
                 if packet_number == 0:
                     # MariaDB sends error packet with seqno==0 when shutdown
@@ -758,7 +1105,7 @@ class Connection:
                     "Packet sequence number wrong - got %d expected %d"
                     % (packet_number, self._next_seq_id)
                 )
-            self._next_seq_id = (self._next_seq_id + 1) % 256
+            self._next_seq_id = (packet_number + 1) % 256
 
             recv_data = self._read_bytes(bytes_to_read)
             if DEBUG:
@@ -776,6 +1123,36 @@ class Connection:
         return packet
 
     def _read_bytes(self, num_bytes):
+        if self._compression is not None:
+            return self._read_compressed(num_bytes)
+        return self._read_raw(num_bytes)
+
+    def _read_compressed(self, num_bytes):
+        compression = self._compression
+        while compression.buffered() < num_bytes:
+            header = self._read_raw(7)
+            btrl, btrh, packet_number, ucl, uch = struct.unpack("<HBBHB", header)
+            if packet_number != compression.seq:
+                self._force_close()
+                if packet_number == 0:
+                    raise err.OperationalError(
+                        CR.CR_SERVER_LOST,
+                        "Lost connection to MySQL server during query",
+                    )
+                raise err.InternalError(
+                    "Compressed packet sequence number wrong - got %d expected %d"
+                    % (packet_number, compression.seq)
+                )
+            compression.seq = (packet_number + 1) % 256
+            payload = self._read_raw(btrl + (btrh << 16))
+            try:
+                compression.feed(payload, ucl + (uch << 16))
+            except Exception as e:
+                self._force_close()
+                raise err.InternalError(f"Invalid compressed packet ({e})")
+        return compression.read(num_bytes)
+
+    def _read_raw(self, num_bytes):
         self._sock.settimeout(self._read_timeout)
         while True:
             try:
@@ -801,6 +1178,11 @@ class Connection:
         return data
 
     def _write_bytes(self, data):
+        if self._compression is not None:
+            data = self._compression.pack(data)
+        self._send_bytes(data)
+
+    def _send_bytes(self, data):
         self._sock.settimeout(self._write_timeout)
         try:
             self._sock.sendall(data)
@@ -810,18 +1192,19 @@ class Connection:
                 CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
             )
 
-    def _read_query_result(self, unbuffered=False):
+    def _read_query_result(self, unbuffered=False, binary=False):
         self._result = None
+        result_class = BinaryResult if binary else MySQLResult
         if unbuffered:
             try:
-                result = MySQLResult(self)
+                result = result_class(self)
                 result.init_unbuffered_query()
             except:
                 result.unbuffered_active = False
                 result.connection = None
                 raise
         else:
-            result = MySQLResult(self)
+            result = result_class(self)
             result.read()
         self._result = result
         if result.server_status is not None:
@@ -841,7 +1224,17 @@ class Connection:
         """
         if not self._sock:
             raise err.InterfaceError(0, "")
+        self._end_result()
 
+        data, next_seq_id = self._command_packets(command, sql)
+        if self._compression is not None:
+            self._compression.seq = 0
+        self._write_bytes(data)
+        if DEBUG:
+            dump_packet(data)
+        self._next_seq_id = next_seq_id
+
+    def _end_result(self):
         # If the last query was unbuffered, make sure it finishes before
         # sending new commands
         if self._result is not None:
@@ -852,30 +1245,60 @@ class Connection:
                 self.next_result()
             self._result = None
 
+    def _command_packets(self, command, sql):
+        """The packets of a command, and the sequence id of its reply."""
         if isinstance(sql, str):
             sql = sql.encode(self.encoding)
+        if len(sql) + 1 < MAX_PACKET_LEN:
+            # tiny optimization: a single packet, built without slicing
+            return struct.pack("<iB", len(sql) + 1, command) + sql, 1
+
+        # split into packets of MAX_PACKET_LEN, ending with a shorter
+        # (possibly empty) one
+        payload = bytes((command,)) + sql
+        packets = []
+        for seq, start in enumerate(range(0, len(payload) + 1, MAX_PACKET_LEN)):
+            chunk = payload[start : start + MAX_PACKET_LEN]
+            packets.append(_pack_int24(len(chunk)) + bytes((seq % 256,)) + chunk)
+        return b"".join(packets), len(packets) % 256
+
+    def _send_commands(self, commands):
+        """
+        Send several commands in one write, without reading any reply.
 
-        packet_size = min(MAX_PACKET_LEN, len(sql) + 1)  # +1 is for command
-
-        # tiny optimization: build first packet manually instead of
-        # calling self..write_packet()
-        prelude = struct.pack("<iB", packet_size, command)
-        packet = prelude + sql[: packet_size - 1]
-        self._write_bytes(packet)
-        if DEBUG:
-            dump_packet(packet)
-        self._next_seq_id = 1
-
-        if packet_size < MAX_PACKET_LEN:
-            return
+        The server answers them in order. Read each reply with
+        :meth:`_read_reply` and the sequence ids returned for it.
 
-        sql = sql[packet_size - 1 :]
-        while True:
-            packet_size = min(MAX_PACKET_LEN, len(sql))
-            self.write_packet(sql[:packet_size])
-            sql = sql[packet_size:]
-            if not sql and packet_size < MAX_PACKET_LEN:
-                break
+        :param commands: ``(command, arg)`` pairs as for :meth:`_execute_command`.
+        :return: The sequence ids each reply starts with.
+        :raise InterfaceError: If the connection is closed.
+        """
+        if not self._sock:
+            raise err.InterfaceError(0, "")
+        self._end_result()
+
+        chunks = []
+        seq_ids = []
+        for command, sql in commands:
+            data, next_seq_id = self._command_packets(command, sql)
+            compressed_seq = None
+            if self._compression is not None:
+                # every command starts a new compressed sequence
+                self._compression.seq = 0
+                data = self._compression.pack(data)
+                compressed_seq = self._compression.seq
+            chunks.append(data)
+            seq_ids.append((next_seq_id, compressed_seq))
+        self._send_bytes(b"".join(chunks))
+        return seq_ids
+
+    def _read_reply(self, seq_ids, unbuffered=False, binary=False):
+        """Read the result of a command sent with :meth:`_send_commands`."""
+        self._next_seq_id, compressed_seq = seq_ids
+        if compressed_seq is not None:
+            self._compression.seq = compressed_seq
+        self._affected_rows = self._read_query_result(unbuffered, binary)
+        return self._affected_rows
 
     def _request_authentication(self):
         # https://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::HandshakeResponse
@@ -885,6 +1308,18 @@ class Connection:
         if self.user is None:
             raise ValueError("Did not specify a username")
 
+        # servers before MySQL 5.7.5 still end result sets with EOF packets
+        if not self.server_capabilities & CLIENT.DEPRECATE_EOF:
+            self.client_flag &= ~CLIENT.DEPRECATE_EOF
+
+        self.client_flag &= ~(CLIENT.COMPRESS | CLIENT.ZSTD_COMPRESSION_ALGORITHM)
+        codec = self._compression_codec()
+        if codec is not None:
+            if codec.name == "zstd":
+                self.client_flag |= CLIENT.ZSTD_COMPRESSION_ALGORITHM
+            else:
+                self.client_flag |= CLIENT.COMPRESS
+
         charset_id = charset_by_name(self.charset).id
         if isinstance(self.user, str):
             self.user = self.user.encode(self.encoding)
@@ -902,6 +1337,59 @@ class Connection:
 
         data = data_init + self.user + b"\0"
 
+        plugin_name, authresp = self._scramble()
+
+        if self.server_capabilities & CLIENT.PLUGIN_AUTH_LENENC_CLIENT_DATA:
+            data += _lenenc_int(len(authresp)) + authresp
+        elif self.server_capabilities & CLIENT.SECURE_CONNECTION:
+            data += struct.pack("B", len(authresp)) + authresp
+        else:  # pragma: no cover - not testing against servers without secure auth (>=5.0)
+            data += authresp + b"\0"
+
+        if self.db and self.server_capabilities & CLIENT.CONNECT_WITH_DB:
+            if isinstance(self.db, str):
+                self.db = self.db.encode(self.encoding)
+            data += self.db + b"\0"
+
+        if self.server_capabilities & CLIENT.PLUGIN_AUTH:
+            data += (plugin_name or b"") + b"\0"
+
+        if self.server_capabilities & CLIENT.CONNECT_ATTRS:
+            data += self._connect_attrs_data()
+
+        if self.client_flag & CLIENT.ZSTD_COMPRESSION_ALGORITHM:
+            data += struct.pack("B", codec.level)
+
+        self.write_packet(data)
+        self._finish_authentication(self._read_packet())
+        if codec is not None:
+            # everything after the authentication is compressed
+            from ._compress import CompressedPackets
+
+            self._compression = CompressedPackets(codec, self.compress_min_size)
+
+    def _compression_codec(self):
+        """The compression codec for this connection, None for no compression."""
+        if self.compress is None:
+            return None
+        from . import _compress
+
+        level = self.compress_level
+        if (
+            self.compress == "zstd"
+            and self.server_capabilities & CLIENT.ZSTD_COMPRESSION_ALGORITHM
+        ):
+            try:
+                return _compress.ZstdCodec(level)
+            except ImportError:
+                pass
+        if self.server_capabilities & CLIENT.COMPRESS:
+            # a zstd level may be out of zlib's range
+            return _compress.ZlibCodec(level if self.compress == "zlib" else None)
+        return None
+
+    def _scramble(self):
+        """(plugin name, auth response) for the server's default auth plugin."""
         authresp = b""
         plugin_name = None
 
@@ -928,34 +1416,19 @@ class Connection:
                 authresp = b"\1"  # request public key
             else:
                 authresp = b"\0"  # empty password
-
-        if self.server_capabilities & CLIENT.PLUGIN_AUTH_LENENC_CLIENT_DATA:
-            data += _lenenc_int(len(authresp)) + authresp
-        elif self.server_capabilities & CLIENT.SECURE_CONNECTION:
-            data += struct.pack("B", len(authresp)) + authresp
-        else:  # pragma: no cover - not testing against servers without secure auth (>=5.0)
-            data += authresp + b"\0"
-
-        if self.db and self.server_capabilities & CLIENT.CONNECT_WITH_DB:
-            if isinstance(self.db, str):
-                self.db = self.db.encode(self.encoding)
-            data += self.db + b"\0"
-
-        if self.server_capabilities & CLIENT.PLUGIN_AUTH:
-            data += (plugin_name or b"") + b"\0"
-
-        if self.server_capabilities & CLIENT.CONNECT_ATTRS:
-            connect_attrs = b""
-            for k, v in self._connect_attrs.items():
-                k = k.encode("utf-8")
-                connect_attrs += _lenenc_int(len(k)) + k
-                v = v.encode("utf-8")
-                connect_attrs += _lenenc_int(len(v)) + v
-            data += _lenenc_int(len(connect_attrs)) + connect_attrs
-
-        self.write_packet(data)
-        auth_packet = self._read_packet()
-
+        return plugin_name, authresp
+
+    def _connect_attrs_data(self):
+        connect_attrs = b""
+        for k, v in self._connect_attrs.items():
+            k = k.encode("utf-8")
+            connect_attrs += _lenenc_int(len(k)) + k
+            v = v.encode("utf-8")
+            connect_attrs += _lenenc_int(len(v)) + v
+        return _lenenc_int(len(connect_attrs)) + connect_attrs
+
+    def _finish_authentication(self, auth_packet):
+        """Handle the server's reply to a handshake response or COM_CHANGE_USER."""
         # if authentication method isn't accepted the first byte
         # will have the octet 254
         if auth_packet.is_auth_switch_request():
@@ -1173,6 +1646,26 @@ class Connection:
     NotSupportedError = err.NotSupportedError
 
 
+class PreparedStatement:
+    """
+    A statement prepared on the server with :meth:`Connection.prepare`.
+
+    It belongs to the connection that prepared it and is only valid until
+    that connection is closed, reconnected or reset.
+    """
+
+    __slots__ = ("sql", "statement_id", "param_count", "field_count")
+
+    def __init__(self, sql, statement_id, param_count, field_count):
+        self.sql = sql
+        self.statement_id = statement_id
+        self.param_count = param_count
+        self.field_count = field_count
+
+    def __repr__(self):
+        return f"<PreparedStatement {self.statement_id}: {self.sql!r}>"
+
+
 class MySQLResult:
     def __init__(self, connection):
         """
@@ -1189,6 +1682,9 @@ class MySQLResult:
         self.rows = None
         self.has_next = None
         self.unbuffered_active = False
+        # no EOF packet after the column definitions, and an OK packet
+        # instead of the EOF packet at the end of the rows
+        self._deprecate_eof = bool(connection.client_flag & CLIENT.DEPRECATE_EOF)
 
     def __del__(self):
         if self.unbuffered_active:
@@ -1265,15 +1761,16 @@ class MySQLResult:
         self._read_ok_packet(ok_packet)
 
     def _check_packet_is_eof(self, packet):
-        if not packet.is_eof_packet():
-            return False
-        # TODO: Support CLIENT.DEPRECATE_EOF
-        # 1) Add DEPRECATE_EOF to CAPABILITIES
-        # 2) Mask CAPABILITIES with server_capabilities
-        # 3) if server_capabilities & CLIENT.DEPRECATE_EOF:
-        #    use OKPacketWrapper instead of EOFPacketWrapper
-        wp = EOFPacketWrapper(packet)
+        if self._deprecate_eof:
+            if not packet.is_ok_eof_packet():
+                return False
+            wp = OKPacketWrapper(packet)
+        else:
+            if not packet.is_eof_packet():
+                return False
+            wp = EOFPacketWrapper(packet)
         self.warning_count = wp.warning_count
+        self.server_status = wp.server_status
         self.has_next = wp.has_next
         return True
 
@@ -1308,6 +1805,8 @@ class MySQLResult:
             try:
                 packet = self.connection._read_packet()
             except err.OperationalError as e:
+                from .constants import ER
+
                 if e.args[0] in (
                     ER.QUERY_TIMEOUT,
                     ER.STATEMENT_TIMEOUT,
@@ -1394,11 +1893,200 @@ class MySQLResult:
                 print(f"DEBUG: field={field}, converter={converter}")
             self.converters.append((encoding, converter))
 
-        eof_packet = self.connection._read_packet()
-        assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
+        if not self._deprecate_eof:
+            eof_packet = self.connection._read_packet()
+            assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
         self.description = tuple(description)
 
 
+class BinaryResult(MySQLResult):
+    """
+    Result of :meth:`Connection.execute_prepared`, whose rows use the binary
+    protocol.
+
+    Integers and floats are unpacked with :mod:`struct`, and dates and times
+    are built from their packed fields, without the text protocol's string
+    parsing; the other columns arrive as strings and go through the
+    connection's decoders like text protocol results. The decoders are
+    chosen once per result set: in a row without NULLs every column is at a
+    fixed position, so neighbouring fixed-width columns are unpacked with a
+    single struct call.
+    """
+
+    def _get_descriptions(self):
+        super()._get_descriptions()
+        # 0x00 header, then the NULL bitmap, which starts at bit 2
+        self._values_start = 1 + (self.field_count + 9) // 8
+        self._no_nulls = bytes(self._values_start - 1)
+        self._decoders = []
+        plan = []
+        fixed = ""
+        for field, (encoding, converter) in zip(self.fields, self.converters):
+            fmt = _BINARY_FIXED.get(field.type_code)
+            if fmt is not None:
+                # DOUBLE UNSIGNED is still an ordinary double
+                if field.flags & FLAG.UNSIGNED and fmt != "d":
+                    fmt = fmt.upper()
+                self._decoders.append(_fixed_decoder(struct.Struct("<" + fmt)))
+                fixed += fmt
+                continue
+            if fixed:
+                plan.append(_fixed_step(fixed))
+                fixed = ""
+            decoder = _BINARY_DECODERS.get(field.type_code)
+            if decoder is None:
+                decoder = _text_decoder(encoding, converter)
+            self._decoders.append(decoder)
+            plan.append((None, 0, decoder))
+        if fixed:
+            plan.append(_fixed_step(fixed))
+        self._plan = tuple(plan)
+
+    def _read_row_from_packet(self, packet):
+        data = packet.get_all_data()
+        pos = self._values_start
+        row = []
+        if data[1:pos] == self._no_nulls:
+            for unpack, size, decode in self._plan:
+                if unpack is not None:
+                    row += unpack(data, pos)
+                    pos += size
+                else:
+                    value, pos = decode(data, pos)
+                    row.append(value)
+            return tuple(row)
+
+        null_bitmap = data[1:pos]
+        for i, decode in enumerate(self._decoders):
+            bit = i + 2
+            if null_bitmap[bit >> 3] & (1 << (bit & 7)):
+                row.append(None)
+            else:
+                value, pos = decode(data, pos)
+                row.append(value)
+        return tuple(row)
+
+
+# struct formats of the fixed-width binary types (the integer formats are
+# upper-cased for UNSIGNED columns)
+_BINARY_FIXED = {
+    FIELD_TYPE.TINY: "b",
+    FIELD_TYPE.SHORT: "h",
+    FIELD_TYPE.YEAR: "h",
+    FIELD_TYPE.INT24: "i",
+    FIELD_TYPE.LONG: "i",
+    FIELD_TYPE.LONGLONG: "q",
+    FIELD_TYPE.DOUBLE: "d",
+}
+
+
+def _fixed_step(fmt):
+    packer = struct.Struct("<" + fmt)
+    return packer.unpack_from, packer.size, None
+
+
+def _fixed_decoder(packer):
+    unpack_from = packer.unpack_from
+    size = packer.size
+
+    def decode(data, pos):
+        return unpack_from(data, pos)[0], pos + size
+
+    return decode
+
+
+def _read_length(data, pos):
+    """Length-encoded integer at pos and the position after it."""
+    length = data[pos]
+    if length < 0xFB:
+        return length, pos + 1
+    if length == 0xFC:
+        return _UINT16.unpack_from(data, pos + 1)[0], pos + 3
+    if length == 0xFD:
+        return int.from_bytes(data[pos + 1 : pos + 4], "little"), pos + 4
+    return _UINT64.unpack_from(data, pos + 1)[0], pos + 9
+
+
+def _text_decoder(encoding, converter):
+    def decode(data, pos):
+        length, pos = _read_length(data, pos)
+        end = pos + length
+        value = data[pos:end]
+        if encoding is not None:
+            value = value.decode(encoding)
+        if converter is not None:
+            value = converter(value)
+        return value, end
+
+    return decode
+
+
+_UINT16 = struct.Struct("<H")
+_UINT32 = struct.Struct("<I")
+_UINT64 = struct.Struct("<Q")
+_FLOAT = struct.Struct("<f")
+_DATE = struct.Struct("<HBB")
+_DATETIME = struct.Struct("<HBBBBB")
+_DATETIME_US = struct.Struct("<HBBBBBI")
+_TIME = struct.Struct("<BIBBB")
+
+
+def _decode_float(data, pos):
+    # as in the text protocol, which sends 6 significant digits
+    return float("%.6g" % _FLOAT.unpack_from(data, pos)[0]), pos + 4
+
+
+def _temporal_fields(data, pos):
+    """Fields of a DATE/DATETIME value; the length leaves out zero fields."""
+    length = data[pos]
+    if length == 7:
+        return _DATETIME.unpack_from(data, pos + 1) + (0,), pos + 8
+    if length == 11:
+        return _DATETIME_US.unpack_from(data, pos + 1), pos + 12
+    if length == 4:
+        return _DATE.unpack_from(data, pos + 1) + (0, 0, 0, 0), pos + 5
+    return (0, 0, 0, 0, 0, 0, 0), pos + 1 + length
+
+
+def _decode_date(data, pos):
+    fields, end = _temporal_fields(data, pos)
+    try:
+        return datetime.date(*fields[:3]), end
+    except ValueError:
+        # zero or invalid dates are returned as str, like convert_date()
+        return "%04d-%02d-%02d" % fields[:3], end
+
+
+def _decode_datetime(data, pos):
+    fields, end = _temporal_fields(data, pos)
+    try:
+        return datetime.datetime(*fields), end
+    except ValueError:
+        # zero or invalid dates are returned as str, like convert_datetime()
+        return "%04d-%02d-%02d %02d:%02d:%02d" % fields[:6], end
+
+
+def _decode_time(data, pos):
+    length = data[pos]
+    if not length:
+        return datetime.timedelta(0), pos + 1
+    negative, days, hours, minutes, seconds = _TIME.unpack_from(data, pos + 1)
+    microseconds = _UINT32.unpack_from(data, pos + 9)[0] if length > 8 else 0
+    value = datetime.timedelta(
+        days, hours * 3600 + minutes * 60 + seconds, microseconds
+    )
+    return -value if negative else value, pos + 1 + length
+
+
+_BINARY_DECODERS = {
+    FIELD_TYPE.FLOAT: _decode_float,
+    FIELD_TYPE.DATE: _decode_date,
+    FIELD_TYPE.DATETIME: _decode_datetime,
+    FIELD_TYPE.TIMESTAMP: _decode_datetime,
+    FIELD_TYPE.TIME: _decode_time,
+}
+
+
 class LoadLocalFile:
     def __init__(self, filename, connection):
         self.filename = filename
@@ -1421,6 +2109,8 @@ class LoadLocalFile:
                         break
                     conn.write_packet(chunk)
         except OSError:
+            from .constants import ER
+
             raise err.OperationalError(
                 ER.FILE_NOT_FOUND,
                 f"Can't find file '{self.filename}'",
@@ -1,3 +1,4 @@
+from functools import lru_cache
 import re
 import warnings
 from . import err
@@ -13,6 +14,23 @@ RE_INSERT_VALUES = re.compile(
     re.IGNORECASE | re.DOTALL,
 )
 
+#: Placeholders (and escaped percent signs) replaced by :class:`PreparedCursor`.
+RE_PLACEHOLDER = re.compile(r"%%|%s|%\(([^)]*)\)s")
+
+
+@lru_cache(maxsize=256)
+def _qmark_query(query):
+    """Rewrite ``%s``/``%(name)s`` placeholders to ``?`` and collect the names."""
+    names = []
+
+    def replace(m):
+        if m.group(0) == "%%":
+            return "%"
+        names.append(m.group(1))
+        return "?"
+
+    return RE_PLACEHOLDER.sub(replace, query), tuple(names)
+
 
 class Cursor:
     """
@@ -529,3 +547,73 @@ class SSCursor(Cursor):
 
 class SSDictCursor(DictCursorMixin, SSCursor):
     """An unbuffered cursor, which returns results as a dictionary"""
+
+
+class PreparedCursor(Cursor):
+    """
+    A cursor that runs statements as server-side prepared statements.
+
+    Each distinct statement is prepared once per connection (see
+    :meth:`~pymysql.connections.Connection.prepare`) and executed with the
+    arguments sent in binary form, so the server does not parse the SQL
+    again and no argument is escaped. Placeholders are written as for
+    :class:`Cursor`.
+
+    Statements that need no arguments, or differ in every execution, gain
+    nothing from this and are better run with a :class:`Cursor`.
+    """
+
+    def execute(self, query, args=None):
+        """Execute a prepared query.
+
+        :param query: Query to execute.
+        :type query: str
+
+        :param args: Parameters used with query. (optional)
+        :type args: tuple, list or dict
+
+        :return: Number of affected rows.
+        :rtype: int
+
+        If args is a list or tuple, %s can be used as a placeholder in the query.
+        If args is a dict, %(name)s can be used as a placeholder in the query.
+        """
+        while self.nextset():
+            pass
+
+        stmt_query, params = self._bind(query, args)
+        conn = self._get_db()
+        stmt = conn.prepare(stmt_query)
+        self._clear_result()
+        conn.execute_prepared(stmt, params)
+        self._do_get_result()
+        self._executed = query
+        return self.rowcount
+
+    def _bind(self, query, args):
+        """The statement with ``?`` placeholders, and its arguments in order."""
+        if args is None:
+            return query, ()
+        stmt_query, names = _qmark_query(query)
+        if isinstance(args, dict):
+            if None in names:
+                raise err.ProgrammingError("%s placeholder used with dict args")
+            return stmt_query, tuple(args[name] for name in names)
+        if any(name is not None for name in names):
+            raise err.ProgrammingError("%(name)s placeholder used without dict args")
+        return stmt_query, tuple(args) if isinstance(args, (tuple, list)) else (args,)
+
+    def executemany(self, query, args):
+        """Run the prepared query once for each of the args.
+
+        :return: Number of rows affected, if any.
+        :rtype: int or None
+        """
+        if not args:
+            return
+        self.rowcount = sum(self.execute(query, arg) for arg in args)
+        return self.rowcount
+
+
+class PreparedDictCursor(DictCursorMixin, PreparedCursor):
+    """A prepared statement cursor which returns results as a dictionary"""
@@ -1,7 +1,6 @@
+import _thread
 import struct
 
-from .constants import ER
-
 
 class MySQLError(Exception):
     """Exception related to operation with MySQL."""
@@ -66,72 +65,102 @@ class NotSupportedError(DatabaseError):
     has transactions turned off."""
 
 
-error_map = {}
+# threading.Lock without importing threading, which "import pymysql"
+# otherwise does not need
+_error_map_lock = _thread.allocate_lock()
+_error_map = None
+
+
+def __getattr__(name):
+    if name == "error_map":
+        return _get_error_map()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_error_map():
+    """The errno -> exception class mapping, built on first use."""
+    global _error_map
+    if _error_map is None:
+        with _error_map_lock:
+            if _error_map is None:
+                # published only once complete, so no thread ever sees a
+                # partial map
+                _error_map = _build_error_map()
+    return _error_map
 
 
-def _map_error(exc, *errors):
+def _map_error(error_map, exc, *errors):
     for error in errors:
         error_map[error] = exc
 
 
-_map_error(
-    ProgrammingError,
-    ER.DB_CREATE_EXISTS,
-    ER.SYNTAX_ERROR,
-    ER.PARSE_ERROR,
-    ER.NO_SUCH_TABLE,
-    ER.WRONG_DB_NAME,
-    ER.WRONG_TABLE_NAME,
-    ER.FIELD_SPECIFIED_TWICE,
-    ER.INVALID_GROUP_FUNC_USE,
-    ER.UNSUPPORTED_EXTENSION,
-    ER.TABLE_MUST_HAVE_COLUMNS,
-    ER.CANT_DO_THIS_DURING_AN_TRANSACTION,
-    ER.WRONG_DB_NAME,
-    ER.WRONG_COLUMN_NAME,
-)
-_map_error(
-    DataError,
-    ER.WARN_DATA_TRUNCATED,
-    ER.WARN_NULL_TO_NOTNULL,
-    ER.WARN_DATA_OUT_OF_RANGE,
-    ER.NO_DEFAULT,
-    ER.PRIMARY_CANT_HAVE_NULL,
-    ER.DATA_TOO_LONG,
-    ER.DATETIME_FUNCTION_OVERFLOW,
-    ER.TRUNCATED_WRONG_VALUE_FOR_FIELD,
-    ER.ILLEGAL_VALUE_FOR_TYPE,
-)
-_map_error(
-    IntegrityError,
-    ER.DUP_ENTRY,
-    ER.NO_REFERENCED_ROW,
-    ER.NO_REFERENCED_ROW_2,
-    ER.ROW_IS_REFERENCED,
-    ER.ROW_IS_REFERENCED_2,
-    ER.CANNOT_ADD_FOREIGN,
-    ER.BAD_NULL_ERROR,
-)
-_map_error(
-    NotSupportedError,
-    ER.WARNING_NOT_COMPLETE_ROLLBACK,
-    ER.NOT_SUPPORTED_YET,
-    ER.FEATURE_DISABLED,
-    ER.UNKNOWN_STORAGE_ENGINE,
-)
-_map_error(
-    OperationalError,
-    ER.DBACCESS_DENIED_ERROR,
-    ER.ACCESS_DENIED_ERROR,
-    ER.CON_COUNT_ERROR,
-    ER.TABLEACCESS_DENIED_ERROR,
-    ER.COLUMNACCESS_DENIED_ERROR,
-    ER.CONSTRAINT_FAILED,
-    ER.LOCK_DEADLOCK,
-)
-
-
-del _map_error, ER
+def _build_error_map():
+    # The ER table is large and only needed once the server reports an
+    # error, so it is loaded then rather than when pymysql is imported.
+    from .constants import ER
+
+    error_map = {}
+    _map_error(
+        error_map,
+        ProgrammingError,
+        ER.DB_CREATE_EXISTS,
+        ER.SYNTAX_ERROR,
+        ER.PARSE_ERROR,
+        ER.NO_SUCH_TABLE,
+        ER.WRONG_DB_NAME,
+        ER.WRONG_TABLE_NAME,
+        ER.FIELD_SPECIFIED_TWICE,
+        ER.INVALID_GROUP_FUNC_USE,
+        ER.UNSUPPORTED_EXTENSION,
+        ER.TABLE_MUST_HAVE_COLUMNS,
+        ER.CANT_DO_THIS_DURING_AN_TRANSACTION,
+        ER.WRONG_DB_NAME,
+        ER.WRONG_COLUMN_NAME,
+    )
+    _map_error(
+        error_map,
+        DataError,
+        ER.WARN_DATA_TRUNCATED,
+        ER.WARN_NULL_TO_NOTNULL,
+        ER.WARN_DATA_OUT_OF_RANGE,
+        ER.NO_DEFAULT,
+        ER.PRIMARY_CANT_HAVE_NULL,
+        ER.DATA_TOO_LONG,
+        ER.DATETIME_FUNCTION_OVERFLOW,
+        ER.TRUNCATED_WRONG_VALUE_FOR_FIELD,
+        ER.ILLEGAL_VALUE_FOR_TYPE,
+    )
+    _map_error(
+        error_map,
+        IntegrityError,
+        ER.DUP_ENTRY,
+        ER.NO_REFERENCED_ROW,
+        ER.NO_REFERENCED_ROW_2,
+        ER.ROW_IS_REFERENCED,
+        ER.ROW_IS_REFERENCED_2,
+        ER.CANNOT_ADD_FOREIGN,
+        ER.BAD_NULL_ERROR,
+    )
+    _map_error(
+        error_map,
+        NotSupportedError,
+        ER.WARNING_NOT_COMPLETE_ROLLBACK,
+        ER.NOT_SUPPORTED_YET,
+        ER.FEATURE_DISABLED,
+        ER.UNKNOWN_STORAGE_ENGINE,
+    )
+    _map_error(
+        error_map,
+        OperationalError,
+        ER.DBACCESS_DENIED_ERROR,
+        ER.ACCESS_DENIED_ERROR,
+        ER.CON_COUNT_ERROR,
+        ER.TABLEACCESS_DENIED_ERROR,
+        ER.COLUMNACCESS_DENIED_ERROR,
+        ER.CONSTRAINT_FAILED,
+        ER.LOCK_DEADLOCK,
+    )
+    return error_map
 
 
 def raise_mysql_exception(data):
@@ -144,7 +173,7 @@ def raise_mysql_exception(data):
         errval = data[9:].decode("utf-8", "replace")
     else:
         errval = data[3:].decode("utf-8", "replace")
-    errorclass = error_map.get(errno)
+    errorclass = _get_error_map().get(errno)
     if errorclass is None:
         errorclass = InternalError if errno < 1000 else OperationalError
     raise errorclass(errno, errval)
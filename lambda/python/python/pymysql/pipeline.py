@@ -0,0 +1,161 @@
+"""
+Several statements sent in one write, with their results read back in order.
+
+``import pymysql`` does not import this module; create a pipeline with
+:meth:`Connection.pipeline() <pymysql.connections.Connection.pipeline>`::
+
+    pipe = conn.pipeline()
+    version = pipe.execute("SELECT version FROM table_versions WHERE name = %s", ("tasks",))
+    page = pipe.execute("SELECT * FROM tasks ORDER BY id DESC LIMIT %s", (50,))
+    pipe.run()
+    print(version.fetchone(), page.fetchall())
+"""
+
+from . import err
+from .constants import COMMAND
+from .cursors import PreparedCursor, SSCursor
+
+
+class Pipeline:
+    """
+    Statements queued on one connection and run in a single network round
+    trip.
+
+    :meth:`execute` queues a statement and returns the cursor that will
+    hold its result. :meth:`run` sends all queued statements in one write
+    and then reads their results in order. The server runs the statements
+    one after the other, exactly as if they had been executed separately:
+    a statement that fails does not stop the ones queued after it, and its
+    error is reported for that statement only. Queue statements that
+    depend on an earlier one succeeding in separate round trips, or in a
+    transaction that the caller rolls back.
+
+    Statements of a :class:`~pymysql.cursors.PreparedCursor` that are not
+    prepared on the connection yet are prepared before the pipeline is
+    sent, one round trip each, so the pipeline itself is one round trip
+    from the second run on. Of a statement that returns several result
+    sets (a CALL, or several statements in one query), only the first is
+    kept, except for the last statement in the pipeline.
+
+    A pipeline runs once.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        # (cursor, query, args) in the order they were queued
+        self._queue = []
+        self._done = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def execute(self, query, args=None, cursor=None):
+        """
+        Queue a statement.
+
+        :param query: Query to execute, with placeholders as for
+            :meth:`Cursor.execute() <pymysql.cursors.Cursor.execute>`.
+        :type query: str
+        :param args: Parameters used with query. (optional)
+        :type args: tuple, list or dict
+        :param cursor: Cursor class that receives the result. With a
+            :class:`~pymysql.cursors.PreparedCursor` the statement runs as a
+            prepared statement. An unbuffered cursor
+            (:class:`~pymysql.cursors.SSCursor`) may only be used for the
+            last statement. (default: the connection's cursorclass)
+        :return: The cursor, which holds the result once :meth:`run` returned.
+
+        :raise ProgrammingError: If the pipeline has already run.
+        """
+        if self._done:
+            raise err.ProgrammingError("Pipeline has already run")
+        cur = self.connection.cursor(cursor)
+        self._queue.append((cur, query, args))
+        return cur
+
+    def run(self, raise_on_error=True):
+        """
+        Send the queued statements and read their results.
+
+        :param raise_on_error: Raise the error of the first statement that
+            failed, after the results of all statements are read. With
+            False, the error takes the place of the statement's cursor in
+            the returned list instead.
+        :return: The cursors of the queued statements, in order.
+        :rtype: list
+
+        :raise OperationalError: If the connection is lost; the results not
+            read yet are lost with it.
+        :raise ProgrammingError: If the pipeline has already run, or an
+            unbuffered cursor is not used for the last statement.
+        """
+        if self._done:
+            raise err.ProgrammingError("Pipeline has already run")
+        self._done = True
+        if not self._queue:
+            return []
+        for cur, _, _ in self._queue[:-1]:
+            if isinstance(cur, SSCursor):
+                raise err.ProgrammingError(
+                    "Only the last statement of a pipeline can be unbuffered"
+                )
+
+        conn = self.connection
+        commands = self._commands()
+        seq_ids = conn._send_commands(commands)
+        last = len(commands) - 1
+        results = []
+        first_error = None
+        for i, (cur, _, _) in enumerate(self._queue):
+            cur._clear_result()
+            try:
+                conn._read_reply(
+                    seq_ids[i],
+                    unbuffered=isinstance(cur, SSCursor),
+                    binary=commands[i][0] == COMMAND.COM_STMT_EXECUTE,
+                )
+            except err.MySQLError as e:
+                if not conn.open:
+                    raise
+                results.append(e)
+                first_error = first_error or e
+                continue
+            cur._do_get_result()
+            results.append(cur)
+            if i != last:
+                # the next reply follows this statement's last result set
+                conn._end_result()
+        if raise_on_error and first_error is not None:
+            if isinstance(cur, SSCursor):
+                # the caller never gets this cursor: skip the rest of its rows
+                cur.close()
+            raise first_error
+        return results
+
+    def _commands(self):
+        """The (command, arg) pairs of the queued statements."""
+        conn = self.connection
+        prepared = set()
+        commands = []
+        for cur, query, args in self._queue:
+            if isinstance(cur, PreparedCursor):
+                sql, params = cur._bind(query, args)
+                prepared.add(sql)
+                # prepare() evicts the least recently used statements, so
+                # all of the pipeline's statements must fit in the cache
+                if len(prepared) > conn.prepared_cache_size:
+                    raise err.ProgrammingError(
+                        "Pipeline uses more prepared statements than "
+                        f"prepared_cache_size ({conn.prepared_cache_size})"
+                    )
+                stmt = conn.prepare(sql)
+                cur._executed = query
+                commands.append(
+                    (COMMAND.COM_STMT_EXECUTE, conn._stmt_execute_payload(stmt, params))
+                )
+            else:
+                sql = cur._executed = cur.mogrify(query, args)
+                if isinstance(sql, str):
+                    sql = sql.encode(conn.encoding, "surrogateescape")
+                commands.append((COMMAND.COM_QUERY, sql))
+        return commands
@@ -0,0 +1,382 @@
+"""
+Thread-safe connection pool.
+
+``import pymysql`` does not import this module; use
+``from pymysql.pool import ConnectionPool``::
+
+    pool = ConnectionPool(host="db", user="app", password="...", max_size=8)
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import err
+from .connections import Connection
+from .constants import SERVER_STATUS
+
+
+class PoolError(err.InterfaceError):
+    """Raised when a connection cannot be taken from a closed pool."""
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection became available within the timeout."""
+
+
+_DEFAULT = object()
+
+
+class _Entry:
+    __slots__ = ("conn", "created", "last_used", "autocommit")
+
+    def __init__(self, conn, now):
+        self.conn = conn
+        self.created = now
+        self.last_used = now
+        self.autocommit = conn.get_autocommit()
+
+
+class ConnectionPool:
+    """
+    A bounded pool of :class:`~pymysql.connections.Connection` objects that
+    can be shared between threads. Each connection is used by one thread at
+    a time.
+
+    :param min_size: Connections opened when the pool is created and kept
+        open while idle. (default: 0)
+    :param max_size: Maximum number of open connections, in use or idle. (default: 10)
+    :param timeout: Seconds :meth:`get_connection` waits for a connection
+        before raising :class:`PoolTimeout`, None to wait forever. (default: 30)
+    :param max_lifetime: Connections older than this many seconds are closed
+        instead of being reused, None for no limit. (default: 3600)
+    :param idle_timeout: Idle connections beyond ``min_size`` that have not
+        been used for this many seconds are closed, None to keep them. (default: 600)
+    :param ping_interval: A connection idle for at least this many seconds is
+        pinged before it is handed out; 0 pings on every checkout, None never.
+        (default: 30)
+    :param reset_on_return: What to do with a returned connection:
+        ``"rollback"`` rolls back an open transaction and restores the
+        autocommit mode, which costs nothing for a connection that did
+        neither; ``"session"`` resets the whole session state (temporary
+        tables, user variables, locks) with
+        :meth:`~pymysql.connections.Connection.reset_session`, one round trip
+        per return; None leaves the connection as it is. (default: "rollback")
+    :param prewarm_workers: Threads that open the ``min_size`` connections in
+        parallel when the pool is created. (default: 4)
+    :param connection_class: Class of the pooled connections. (default: Connection)
+    :param kwargs: Passed to ``connection_class``.
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        timeout=30,
+        max_lifetime=3600,
+        idle_timeout=600,
+        ping_interval=30,
+        reset_on_return="rollback",
+        prewarm_workers=4,
+        connection_class=Connection,
+        **kwargs,
+    ):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("need 0 <= min_size <= max_size and max_size >= 1")
+        if reset_on_return not in ("rollback", "session", None):
+            raise ValueError("reset_on_return must be 'rollback', 'session' or None")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.reset_on_return = reset_on_return
+        self.connection_class = connection_class
+        self.connect_kwargs = kwargs
+
+        self._cond = threading.Condition()
+        # most recently returned on the right; checkout takes from the right,
+        # idle reaping from the left
+        self._idle = deque()
+        self._in_use = {}
+        # open connections plus connections being opened
+        self._size = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "max_wait": 0.0,
+            "timeouts": 0,
+            "pings": 0,
+            "validation_failures": 0,
+        }
+        if min_size:
+            try:
+                self.prewarm(min_size, prewarm_workers)
+            except BaseException:
+                # the caller never gets the pool, so nobody else can close
+                # the connections that did open
+                self.close()
+                raise
+
+    def _open(self):
+        conn = self.connection_class(**self.connect_kwargs)
+        with self._cond:
+            self._stats["created"] += 1
+        return _Entry(conn, time.monotonic())
+
+    def _discard(self, entry):
+        """Close a connection that is no longer counted by the pool."""
+        try:
+            if entry.conn.open:
+                entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    def _expired(self, entry, now):
+        if self.max_lifetime is None:
+            return False
+        return now - entry.created >= self.max_lifetime
+
+    def prewarm(self, count=None, workers=4):
+        """
+        Open idle connections in parallel until the pool holds ``count``
+        connections (default: ``min_size``).
+
+        :raise MySQLError: If a connection cannot be opened; the connections
+            opened so far stay in the pool.
+        """
+        with self._cond:
+            count = min(self.min_size if count is None else count, self.max_size)
+            missing = max(count - self._size, 0)
+            self._size += missing
+        if not missing:
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        failure = None
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, missing))) as ex:
+            futures = [ex.submit(self._open) for _ in range(missing)]
+            for future in futures:
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failure = failure or e
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    continue
+                with self._cond:
+                    self._idle.append(entry)
+                    self._cond.notify()
+        if failure is not None:
+            raise failure
+
+    def _reap_idle(self, now):
+        """Remove stale idle connections; the caller holds the lock and closes them."""
+        reaped = []
+        for entry in list(self._idle):
+            if self._expired(entry, now) or (
+                self.idle_timeout is not None
+                and self._size - len(reaped) > self.min_size
+                and now - entry.last_used >= self.idle_timeout
+            ):
+                self._idle.remove(entry)
+                reaped.append(entry)
+        self._size -= len(reaped)
+        return reaped
+
+    def _checkout(self, timeout):
+        """Take an idle connection or reserve room for a new one (entry None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = None
+        reaped = []
+        try:
+            with self._cond:
+                reaped = self._reap_idle(time.monotonic())
+                while True:
+                    if self._closed:
+                        raise PoolError("Pool is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        entry = None
+                        break
+                    if waited is None:
+                        waited = time.monotonic()
+                        self._stats["waits"] += 1
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                f"No connection available within {timeout} seconds "
+                                f"(max_size={self.max_size})"
+                            )
+                    self._cond.wait(remaining)
+        finally:
+            with self._cond:
+                if waited is not None:
+                    wait = time.monotonic() - waited
+                    self._stats["wait_time"] += wait
+                    self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+            for old in reaped:
+                self._discard(old)
+        return entry
+
+    def _usable(self, entry):
+        """Check an idle connection before it is handed out."""
+        now = time.monotonic()
+        if not entry.conn.open or self._expired(entry, now):
+            return False
+        idle = now - entry.last_used
+        if self.ping_interval is not None and idle >= self.ping_interval:
+            with self._cond:
+                self._stats["pings"] += 1
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def get_connection(self, timeout=_DEFAULT):
+        """
+        Check out a connection; give it back with :meth:`release`.
+
+        :param timeout: Seconds to wait for a connection. (default: the pool's timeout)
+        :raise PoolTimeout: If no connection became available in time.
+        :raise PoolError: If the pool is closed.
+        """
+        if timeout is _DEFAULT:
+            timeout = self.timeout
+        while True:
+            entry = self._checkout(timeout)
+            if entry is None:
+                try:
+                    entry = self._open()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._usable(entry):
+                with self._cond:
+                    self._size -= 1
+                    self._stats["validation_failures"] += 1
+                    self._cond.notify()
+                self._discard(entry)
+                continue
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+                self._stats["checkouts"] += 1
+            return entry.conn
+
+    def _reset(self, entry):
+        conn = entry.conn
+        if self.reset_on_return == "session":
+            conn.reset_session()
+            return
+        if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            conn.rollback()
+        if conn.get_autocommit() != entry.autocommit:
+            conn.autocommit(entry.autocommit)
+
+    def release(self, conn, discard=False):
+        """
+        Return a connection taken with :meth:`get_connection`.
+
+        :param discard: Close the connection instead of reusing it, e.g.
+            after an error left it in an unknown state.
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None or entry.conn is not conn:
+            raise PoolError("Connection does not belong to this pool")
+
+        keep = not discard and conn.open and not self._closed
+        if keep and self.reset_on_return:
+            try:
+                self._reset(entry)
+            except Exception:
+                keep = False
+        now = time.monotonic()
+        if keep and self._expired(entry, now):
+            keep = False
+
+        with self._cond:
+            if keep and not self._closed:
+                entry.last_used = now
+                self._idle.append(entry)
+            else:
+                self._size -= 1
+                keep = False
+            self._cond.notify()
+        if not keep:
+            self._discard(entry)
+
+    @contextmanager
+    def connection(self, timeout=_DEFAULT):
+        """
+        Context manager that checks out a connection and returns it on exit.
+
+        If the block raises, the connection is still reset and reused when
+        ``reset_on_return`` is set, and closed otherwise.
+        """
+        conn = self.get_connection(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, discard=not self.reset_on_return)
+            raise
+        self.release(conn)
+
+    def close(self):
+        """
+        Close the idle connections and refuse further checkouts.
+
+        Connections still in use are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        """
+        Snapshot of the pool counters.
+
+        ``size``, ``in_use`` and ``idle`` are current connection counts;
+        ``created``, ``closed``, ``checkouts``, ``waits`` (checkouts that had
+        to wait), ``timeouts``, ``pings`` and ``validation_failures`` count
+        events since the pool was created; ``wait_time`` and ``max_wait`` are
+        in seconds.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["in_use"] = len(self._in_use)
+            stats["idle"] = len(self._idle)
+        return stats
@@ -188,6 +188,12 @@ class MysqlPacket:
         # If \xFE is LengthEncodedInteger header, 8bytes followed.
         return self._data[0] == 0xFE and len(self._data) < 9
 
+    def is_ok_eof_packet(self):
+        # With CLIENT_DEPRECATE_EOF a result set ends with an OK packet that
+        # has the EOF header. A text row can only start with \xFE if its
+        # first value is at least 16MB long, so the packet is longer still.
+        return self._data[0] == 0xFE and 7 <= len(self._data) < 0xFFFFFF
+
     def is_auth_switch_request(self):
         # http://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::AuthSwitchRequest
         return self._data[0] == 0xFE
@@ -291,7 +297,7 @@ class OKPacketWrapper:
     """
 
     def __init__(self, from_packet):
-        if not from_packet.is_ok_packet():
+        if not (from_packet.is_ok_packet() or from_packet.is_ok_eof_packet()):
             raise ValueError(
                 "Cannot create "
                 + str(self.__class__.__name__)
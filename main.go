@@ -2,12 +2,16 @@ package main
 
 import (
 	"bytes"
+	"crypto/rand"
+	"encoding/hex"
 	"encoding/json"
 	"fmt"
 	"html/template"
 	"net/http"
+	"net/url"
 	"os"
 	"strconv"
+	"sync"
 
 	"github.com/joho/godotenv"
 )
@@ -21,6 +25,36 @@ type Task struct {
 	Completed   bool   `json:"completed"`
 }
 
+// TaskPage is one page of the task list plus the cursors of its neighbours.
+type TaskPage struct {
+	Tasks      []Task
+	NextCursor string
+	PrevCursor string
+}
+
+// cachedPage is a task page remembered together with the ETag it was served with.
+type cachedPage struct {
+	etag string
+	page TaskPage
+}
+
+// maxCachedPages bounds pageCache; it is simply reset when full.
+const maxCachedPages = 100
+
+// consistencyCookie carries the X-Consistency-Token of the browser's last
+// write to the next page load, so the redirect after a form is read from
+// the writer and shows the change even if the read replica lags. The API
+// ignores tokens older than a few seconds, so the cookie is short-lived.
+const (
+	consistencyCookie    = "consistency_token"
+	consistencyCookieAge = 10
+)
+
+var (
+	pageCacheMu sync.Mutex
+	pageCache   = map[string]cachedPage{}
+)
+
 var (
 	tmpl          *template.Template
 	apiGatewayURL string
@@ -38,7 +72,11 @@ func init() {
 	if listenPort == "" {
 		listenPort = "8080"
 	}
-	tmpl = template.Must(template.ParseFiles("template.html"))
+	// every form gets its own token, the Idempotency-Key of its submission,
+	// so a form submitted twice writes once while two forms never share a key
+	tmpl = template.Must(template.New("template.html").
+		Funcs(template.FuncMap{"formToken": newFormToken}).
+		ParseFiles("template.html"))
 }
 
 func main() {
@@ -57,13 +95,40 @@ func handleHealthz(w http.ResponseWriter, r *http.Request) {
 }
 
 func handleIndex(w http.ResponseWriter, r *http.Request) {
-	resp, err := http.Get(apiGatewayURL + "/tasks")
+	query := url.Values{}
+	for _, key := range []string{"after_id", "before_id"} {
+		if v := r.URL.Query().Get(key); v != "" {
+			query.Set(key, v)
+		}
+	}
+	listURL := apiGatewayURL + "/tasks"
+	if len(query) > 0 {
+		listURL += "?" + query.Encode()
+	}
+	req, _ := http.NewRequest(http.MethodGet, listURL, nil)
+	pageCacheMu.Lock()
+	cached, hasCached := pageCache[listURL]
+	pageCacheMu.Unlock()
+	if hasCached {
+		req.Header.Set("If-None-Match", cached.etag)
+	}
+	if c, err := r.Cookie(consistencyCookie); err == nil {
+		req.Header.Set("X-Consistency-Token", c.Value)
+	}
+	resp, err := http.DefaultClient.Do(req)
 	if err != nil {
 		http.Error(w, "Failed to fetch tasks: "+err.Error(), http.StatusInternalServerError)
 		return
 	}
 	defer resp.Body.Close()
 
+	// a page shown again from the browser cache would reuse the form tokens
+	// of an earlier render for new submissions
+	w.Header().Set("Cache-Control", "no-store")
+	if resp.StatusCode == http.StatusNotModified && hasCached {
+		tmpl.Execute(w, cached.page)
+		return
+	}
 	if resp.StatusCode != http.StatusOK {
 		var errObj map[string]interface{}
 		json.NewDecoder(resp.Body).Decode(&errObj)
@@ -71,12 +136,23 @@ func handleIndex(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 
-	var tasks []Task
-	if err := json.NewDecoder(resp.Body).Decode(&tasks); err != nil {
+	page := TaskPage{
+		NextCursor: resp.Header.Get("X-Next-Cursor"),
+		PrevCursor: resp.Header.Get("X-Prev-Cursor"),
+	}
+	if err := json.NewDecoder(resp.Body).Decode(&page.Tasks); err != nil {
 		http.Error(w, "Invalid task data: "+err.Error(), http.StatusInternalServerError)
 		return
 	}
-	tmpl.Execute(w, tasks)
+	if etag := resp.Header.Get("ETag"); etag != "" {
+		pageCacheMu.Lock()
+		if len(pageCache) >= maxCachedPages {
+			pageCache = map[string]cachedPage{}
+		}
+		pageCache[listURL] = cachedPage{etag: etag, page: page}
+		pageCacheMu.Unlock()
+	}
+	tmpl.Execute(w, page)
 }
 
 func handleCreate(w http.ResponseWriter, r *http.Request) {
@@ -91,8 +167,8 @@ func handleCreate(w http.ResponseWriter, r *http.Request) {
 		"due_date":    r.FormValue("due_date"),
 		"priority":    r.FormValue("priority"),
 	}
-	postJSON("/tasks", task)
-	http.Redirect(w, r, "/", http.StatusSeeOther)
+	token, err := postJSON("/tasks", task, idempotencyKey(r, "/tasks"))
+	finishWrite(w, r, token, err)
 }
 
 func handleUpdate(w http.ResponseWriter, r *http.Request) {
@@ -110,8 +186,9 @@ func handleUpdate(w http.ResponseWriter, r *http.Request) {
 		"priority":    r.FormValue("priority"),
 		"completed":   r.FormValue("completed") == "on",
 	}
-	putJSON("/tasks/"+strconv.Itoa(parsedID), task)
-	http.Redirect(w, r, "/", http.StatusSeeOther)
+	path := "/tasks/" + strconv.Itoa(parsedID)
+	token, err := putJSON(path, task, idempotencyKey(r, path))
+	finishWrite(w, r, token, err)
 }
 
 func handleDelete(w http.ResponseWriter, r *http.Request) {
@@ -121,22 +198,100 @@ func handleDelete(w http.ResponseWriter, r *http.Request) {
 	}
 	id := r.FormValue("id")
 	req, _ := http.NewRequest(http.MethodDelete, apiGatewayURL+"/tasks/"+id, nil)
-	http.DefaultClient.Do(req)
+	token, err := writeResult(http.DefaultClient.Do(req))
+	finishWrite(w, r, token, err)
+}
+
+// newFormToken returns a random token for one rendered form.
+func newFormToken() string {
+	b := make([]byte, 16)
+	if _, err := rand.Read(b); err != nil {
+		return ""
+	}
+	return hex.EncodeToString(b)
+}
+
+// idempotencyKey derives the Idempotency-Key of a form submission from the
+// form's token and the API path. It is empty when the form carries no token.
+func idempotencyKey(r *http.Request, path string) string {
+	token := r.FormValue("form_token")
+	if token == "" {
+		return ""
+	}
+	return token + ":" + path
+}
+
+// rememberWrite stores the consistency token of a write in a cookie.
+func rememberWrite(w http.ResponseWriter, token string) {
+	if token == "" {
+		return
+	}
+	http.SetCookie(w, &http.Cookie{
+		Name:     consistencyCookie,
+		Value:    token,
+		Path:     "/",
+		MaxAge:   consistencyCookieAge,
+		HttpOnly: true,
+	})
+}
+
+// apiError is a 4xx or 5xx answer of the API to a write.
+type apiError struct {
+	status int
+	body   map[string]interface{}
+}
+
+func (e *apiError) Error() string {
+	return fmt.Sprintf("Backend error (%d): %v", e.status, e.body)
+}
+
+// writeResult returns the X-Consistency-Token of a write response, or an
+// error if the request failed or the API rejected the write.
+func writeResult(resp *http.Response, err error) (string, error) {
+	if err != nil {
+		return "", err
+	}
+	defer resp.Body.Close()
+	if resp.StatusCode >= http.StatusBadRequest {
+		var errObj map[string]interface{}
+		json.NewDecoder(resp.Body).Decode(&errObj)
+		return "", &apiError{status: resp.StatusCode, body: errObj}
+	}
+	return resp.Header.Get("X-Consistency-Token"), nil
+}
+
+// finishWrite redirects to the task list after a successful write and
+// shows the error of a failed one instead.
+func finishWrite(w http.ResponseWriter, r *http.Request, token string, err error) {
+	if apiErr, ok := err.(*apiError); ok {
+		http.Error(w, apiErr.Error(), apiErr.status)
+		return
+	}
+	if err != nil {
+		http.Error(w, "Failed to save task: "+err.Error(), http.StatusInternalServerError)
+		return
+	}
+	rememberWrite(w, token)
 	http.Redirect(w, r, "/", http.StatusSeeOther)
 }
 
-func postJSON(path string, data interface{}) {
-	buf := new(bytes.Buffer)
-	json.NewEncoder(buf).Encode(data)
-	http.Post(apiGatewayURL+path, "application/json", buf)
+func postJSON(path string, data interface{}, key string) (string, error) {
+	return sendJSON(http.MethodPost, path, data, key)
 }
 
-func putJSON(path string, data interface{}) {
+func putJSON(path string, data interface{}, key string) (string, error) {
+	return sendJSON(http.MethodPut, path, data, key)
+}
+
+func sendJSON(method, path string, data interface{}, key string) (string, error) {
 	buf := new(bytes.Buffer)
 	json.NewEncoder(buf).Encode(data)
-	req, _ := http.NewRequest(http.MethodPut, apiGatewayURL+path, buf)
+	req, _ := http.NewRequest(method, apiGatewayURL+path, buf)
 	req.Header.Set("Content-Type", "application/json")
-	http.DefaultClient.Do(req)
+	if key != "" {
+		req.Header.Set("Idempotency-Key", key)
+	}
+	return writeResult(http.DefaultClient.Do(req))
 }
 
 func parseInt(s string) int {
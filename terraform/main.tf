@@ -210,8 +210,52 @@ resource "aws_lambda_function" "lambda" {
   }
 }
 
+# Antrian penulisan task (create/update/delete) yang diproses per batch
+# oleh sqs_handler; pesan yang terus gagal dipindah ke DLQ
+resource "aws_sqs_queue" "task_writes_dlq" {
+    name                      = "task-writes-dlq"
+    message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "task_writes" {
+    name                       = "task-writes"
+    # AWS menyarankan minimal 6x timeout sqs_writer (30 detik)
+    visibility_timeout_seconds = 180
+    redrive_policy = jsonencode({
+        deadLetterTargetArn = aws_sqs_queue.task_writes_dlq.arn
+        maxReceiveCount     = 5
+    })
+}
+
+resource "aws_lambda_function" "sqs_writer" {
+    function_name    = "lambda-sqs-writer"
+    role             = data.aws_iam_role.existing_lab_role.arn
+    handler          = "lambda_function.sqs_handler"
+    runtime          = "python3.13"
+    # satu batch berisi hingga 100 penulisan; default 3 detik terlalu pendek
+    timeout          = 30
+
+    filename         = data.archive_file.get.output_path
+    source_code_hash = data.archive_file.get.output_base64sha256
+
+    environment {
+        variables = aws_lambda_function.lambda.environment[0].variables
+    }
+}
+
+resource "aws_lambda_event_source_mapping" "task_writes" {
+    event_source_arn                   = aws_sqs_queue.task_writes.arn
+    function_name                      = aws_lambda_function.sqs_writer.arn
+    batch_size                         = 100
+    maximum_batching_window_in_seconds = 5
+    # hanya pesan yang gagal yang dikirim ulang, bukan seluruh batch
+    function_response_types            = ["ReportBatchItemFailures"]
+}
+
 resource "aws_api_gateway_rest_api" "api" {
     name = "go-api"
+    # lets the Lambda return gzip bodies with isBase64Encoded = true
+    binary_media_types = ["*/*"]
 endpoint_configuration {
     types = ["REGIONAL"]
   }